@@ -0,0 +1,77 @@
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal board reachable from the initial state.
+    """
+    seen = set()
+    boards = []
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = tuple(tuple(row) for row in board)
+        if key in seen or ttt.terminal(board):
+            continue
+        seen.add(key)
+        boards.append(board)
+        for action in ttt.actions(board):
+            stack.append(ttt.result(board, action))
+    return boards
+
+
+def measure(search, boards):
+    """
+    Returns (moves, total nodes, table hits, seconds) of `search` over
+    `boards`, starting from an empty transposition table that is then
+    shared across the boards as it is across moves of a game.
+    """
+    ttt.transpositions.clear()
+    moves = []
+    nodes = 0
+    hits = 0
+    start = time.perf_counter()
+    for board in boards:
+        moves.append(search(board))
+        nodes += ttt.search_stats["nodes"]
+        hits += ttt.search_stats["hits"]
+    return moves, nodes, hits, time.perf_counter() - start
+
+
+def main():
+    if sys.argv[1:] not in [[], ["--all"]]:
+        sys.exit("Usage: python benchmark.py [--all]")
+
+    # Without --all, compare on the empty board and every first reply
+    if sys.argv[1:] == ["--all"]:
+        boards = reachable_positions()
+    else:
+        empty = ttt.initial_state()
+        boards = [empty] + [ttt.result(empty, action) for action in sorted(ttt.actions(empty))]
+
+    searches = [
+        ("exhaustive", ttt.minimax_exhaustive),
+        ("alpha-beta", ttt.minimax_search),
+        ("book", ttt.minimax),
+    ]
+    results = {}
+    for name, search in searches:
+        moves, nodes, hits, elapsed = measure(search, boards)
+        results[name] = moves
+        print(
+            f"{name:>12}: {nodes} nodes, {hits} table hits "
+            f"over {len(boards)} positions, {elapsed:.3f}s"
+        )
+
+    reference = results["exhaustive"]
+    for name, moves in results.items():
+        differences = sum(move != expected for move, expected in zip(moves, reference))
+        if differences:
+            sys.exit(f"{name} chose a different move in {differences} positions")
+
+
+if __name__ == "__main__":
+    main()
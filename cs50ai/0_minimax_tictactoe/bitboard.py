@@ -0,0 +1,174 @@
+"""
+Bitboard Tic Tac Toe engine
+
+A state is a single int: bit `3 * i + j` is set if X played (i, j),
+and bit `9 + 3 * i + j` if O did. Every query is a table lookup, and
+making a move only sets a bit.
+"""
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL = (1 << CELLS) - 1
+O_SHIFT = CELLS
+
+# Masks of the 8 winning lines
+LINES = (
+    [sum(1 << (SIZE * i + j) for j in range(SIZE)) for i in range(SIZE)]
+    + [sum(1 << (SIZE * i + j) for i in range(SIZE)) for j in range(SIZE)]
+    + [sum(1 << (SIZE * i + i) for i in range(SIZE))]
+    + [sum(1 << (SIZE * i + SIZE - 1 - i) for i in range(SIZE))]
+)
+
+# Search order: center first, then corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Indexed by a 9-bit mask of one player's cells, or of the empty cells
+WINNING = [any(mask & line == line for line in LINES) for mask in range(FULL + 1)]
+COUNT = [bin(mask).count("1") for mask in range(FULL + 1)]
+ORDERED_MOVES = [
+    [cell for cell in MOVE_ORDER if mask >> cell & 1] for mask in range(FULL + 1)
+]
+ROW_MAJOR_MOVES = [
+    [cell for cell in range(CELLS) if mask >> cell & 1] for mask in range(FULL + 1)
+]
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations and reflections of the board
+    as lists mapping each cell to its image.
+    """
+    identity = list(range(CELLS))
+    rotate = [SIZE * j + (SIZE - 1 - i) for i in range(SIZE) for j in range(SIZE)]
+    reflect = [SIZE * i + (SIZE - 1 - j) for i in range(SIZE) for j in range(SIZE)]
+    symmetries = []
+    for start in (identity, reflect):
+        permutation = start
+        for _ in range(4):
+            symmetries.append(permutation)
+            permutation = [rotate[cell] for cell in permutation]
+    return symmetries
+
+
+# PERMUTED[s][mask] is `mask` with its cells moved by symmetry s
+PERMUTED = [
+    [
+        sum(1 << permutation[cell] for cell in range(CELLS) if mask >> cell & 1)
+        for mask in range(FULL + 1)
+    ]
+    for permutation in _symmetries()
+]
+
+
+def x_mask(state):
+    return state & FULL
+
+
+def o_mask(state):
+    return state >> O_SHIFT
+
+
+def empty_mask(state):
+    return ~(state | state >> O_SHIFT) & FULL
+
+
+def x_to_move(state):
+    """
+    Returns True if X has the next turn.
+    """
+    return COUNT[state & FULL] == COUNT[state >> O_SHIFT]
+
+
+def moves(state):
+    """
+    Returns the empty cells, most promising first.
+    """
+    return ORDERED_MOVES[empty_mask(state)]
+
+
+def result(state, cell):
+    """
+    Returns the state after the player to move takes `cell`.
+    """
+    return state | 1 << (cell if x_to_move(state) else cell + O_SHIFT)
+
+
+def x_wins(state):
+    return WINNING[state & FULL]
+
+
+def o_wins(state):
+    return WINNING[state >> O_SHIFT]
+
+
+def terminal(state):
+    return WINNING[state & FULL] or WINNING[state >> O_SHIFT] or empty_mask(state) == 0
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[state & FULL]:
+        return 1
+    if WINNING[state >> O_SHIFT]:
+        return -1
+    return 0
+
+
+def canonical(state):
+    """
+    Returns the smallest state among the rotations and reflections
+    of `state`, which all share its game value.
+    """
+    x = state & FULL
+    o = state >> O_SHIFT
+    return min(table[x] | table[o] << O_SHIFT for table in PERMUTED)
+
+
+def cell(action):
+    """
+    Returns the bit index of an (i, j) action.
+    """
+    i, j = action
+    return SIZE * i + j
+
+
+def action(cell):
+    """
+    Returns the (i, j) action of a bit index.
+    """
+    return divmod(cell, SIZE)
+
+
+def from_board(board, x="X", o="O"):
+    """
+    Returns the state of a nested-list board.
+    """
+    state = 0
+    for i, row in enumerate(board):
+        for j, value in enumerate(row):
+            if value == x:
+                state |= 1 << (SIZE * i + j)
+            elif value == o:
+                state |= 1 << (SIZE * i + j + O_SHIFT)
+    return state
+
+
+def to_board(state, x="X", o="O", empty=None):
+    """
+    Returns the nested-list board of a state.
+    """
+    board = []
+    for i in range(SIZE):
+        row = []
+        for j in range(SIZE):
+            bit = SIZE * i + j
+            if state >> bit & 1:
+                row.append(x)
+            elif state >> (bit + O_SHIFT) & 1:
+                row.append(o)
+            else:
+                row.append(empty)
+        board.append(row)
+    return board
@@ -0,0 +1,121 @@
+"""
+Opening book: the optimal move and value of every reachable position
+
+The book is one byte per board, indexed by the base-3 encoding of the
+board (0 empty, 1 X, 2 O per cell), so a lookup is a single index.
+Each byte holds the move's cell in its low 4 bits and the value + 1 in
+the next 2 bits; NO_ENTRY marks boards that are terminal or unreachable.
+"""
+
+import os
+import sys
+
+import bitboard as bb
+
+BOOK_VERSION = 1
+MAGIC = b"TTTBOOK" + bytes([BOOK_VERSION])
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+ENTRIES = 3 ** bb.CELLS
+NO_ENTRY = 0xFF
+
+# TERNARY[mask] is the base-3 weight of the cells of a 9-bit mask
+TERNARY = [
+    sum(3 ** cell for cell in range(bb.CELLS) if mask >> cell & 1)
+    for mask in range(bb.FULL + 1)
+]
+
+# Loaded on the first lookup; False once loading has failed
+_table = None
+
+
+def index(state):
+    return TERNARY[bb.x_mask(state)] + 2 * TERNARY[bb.o_mask(state)]
+
+
+def reachable_states():
+    """
+    Returns every non-terminal state reachable from the empty board.
+    """
+    seen = set()
+    stack = [0]
+    while stack:
+        state = stack.pop()
+        if state in seen or bb.terminal(state):
+            continue
+        seen.add(state)
+        for cell in bb.moves(state):
+            stack.append(bb.result(state, cell))
+    return sorted(seen)
+
+
+def build(search):
+    """
+    Returns the book as bytes, where `search(state)` returns the
+    (cell, value) a full search picks for a state.
+    """
+    table = bytearray([NO_ENTRY]) * ENTRIES
+    for state in reachable_states():
+        cell, value = search(state)
+        table[index(state)] = cell | (value + 1) << 4
+    return MAGIC + bytes(table)
+
+
+def write(data, path=BOOK_PATH):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def load(path=BOOK_PATH):
+    """
+    Returns the table of the book at `path`, or None if it is missing
+    or from another book version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != len(MAGIC) + ENTRIES or not data.startswith(MAGIC):
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(state):
+    """
+    Returns the (cell, value) the book holds for a state, or None if
+    the state is not in the book or there is no usable book.
+    """
+    global _table
+    if _table is None:
+        _table = load() or False
+    if not _table:
+        return None
+    entry = _table[index(state)]
+    if entry == NO_ENTRY:
+        return None
+    return entry & 0xF, (entry >> 4) - 1
+
+
+def main():
+    import tictactoe as ttt
+
+    if sys.argv[1:] not in [[], ["--verify"]]:
+        sys.exit("Usage: python book.py [--verify]")
+
+    data = build(ttt.search_state)
+    if sys.argv[1:] == ["--verify"]:
+        stored = load()
+        if stored is None:
+            sys.exit(f"No usable book at {BOOK_PATH}")
+        if stored != data[len(MAGIC):]:
+            sys.exit("Book does not match the search")
+        print(f"{BOOK_PATH} matches the search.")
+    else:
+        write(data)
+        print(f"Wrote {len(reachable_states())} positions to {BOOK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+m,n,k-game player
+
+Generalizes Tic Tac Toe to a board of any size with any win length,
+such as 4x4 boards or 15x15 gomoku. A Game exposes the same functions
+as the tictactoe module, so runner.py can play either. Its minimax runs
+an iterative-deepening alpha-beta search that stops at a time budget
+and scores unfinished positions with a pluggable heuristic.
+"""
+
+import math
+import time
+
+from tictactoe import EMPTY, O, X
+
+# How many nodes are searched between checks of the deadline
+CHECK_INTERVAL = 256
+
+# Boards with more cells than this only search cells next to a stone
+LOCAL_SEARCH_CELLS = 25
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def count_bits(mask):
+    return bin(mask).count("1")
+
+
+def line_heuristic(game, own, opponent):
+    """
+    Scores a position for the player owning the cells of `own`: every
+    line still open to only one player counts for that player, growing
+    tenfold with each stone already on it.
+    """
+    score = 0
+    for line in game.lines:
+        mine = line & own
+        theirs = line & opponent
+        if mine and not theirs:
+            score += 10 ** count_bits(mine)
+        elif theirs and not mine:
+            score -= 10 ** count_bits(theirs)
+    return score
+
+
+class Game():
+    """
+    An m,n,k-game: `rows` x `cols` board, `k` in a row wins.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3, time_budget=1.0, max_depth=None,
+                 heuristic=line_heuristic):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError("win length must fit on the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.heuristic = heuristic
+        self.cells = rows * cols
+        self.full = (1 << self.cells) - 1
+
+        # Every run of k cells in a row, column or diagonal, as a mask
+        self.lines = []
+        for i in range(rows):
+            for j in range(cols):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.lines.append(sum(
+                            1 << self.cell((i + di * step, j + dj * step))
+                            for step in range(k)
+                        ))
+        # Score of a won position, before adjusting for how soon the win
+        # comes: above anything line_heuristic gives, as no line scores
+        # more than 10 ** k, and other heuristics are clamped below it
+        self.win_score = (len(self.lines) + 1) * 10 ** k
+        # The lines through each cell, to check a win after a move there
+        self.cell_lines = [
+            [line for line in self.lines if line >> cell & 1]
+            for cell in range(self.cells)
+        ]
+        # The cells around each cell, where useful replies are looked for
+        self.neighborhood = []
+        for cell in range(self.cells):
+            i, j = self.action(cell)
+            self.neighborhood.append(sum(
+                1 << self.cell((a, b))
+                for a in range(max(0, i - 1), min(rows, i + 2))
+                for b in range(max(0, j - 1), min(cols, j + 2))
+            ))
+        center = ((rows - 1) / 2, (cols - 1) / 2)
+        self.center_order = sorted(
+            range(self.cells),
+            key=lambda cell: (
+                max(abs(self.action(cell)[0] - center[0]), abs(self.action(cell)[1] - center[1])),
+                cell,
+            ),
+        )
+
+        # Counters for the most recent search
+        self.search_stats = {"nodes": 0, "depth": 0}
+        # Search state: when the current search must stop, and whether the
+        # current depth cut anything short, so a deeper search could differ
+        self.deadline = math.inf
+        self.cancel = None
+        self.truncated = False
+
+    def cell(self, action):
+        i, j = action
+        return i * self.cols + j
+
+    def action(self, cell):
+        return divmod(cell, self.cols)
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def masks(self, board):
+        """
+        Returns the (X, O) cell masks of a board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, value in enumerate(row):
+                if value == X:
+                    x |= 1 << self.cell((i, j))
+                elif value == O:
+                    o |= 1 << self.cell((i, j))
+        return x, o
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.masks(board)
+        return X if count_bits(x) == count_bits(o) else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        x, o = self.masks(board)
+        empty = ~(x | o) & self.full
+        return {self.action(cell) for cell in range(self.cells) if empty >> cell & 1}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.cols) or board[i][j] != EMPTY:
+            raise Exception("Invalid move")
+        result_board = [row[:] for row in board]
+        result_board[i][j] = self.player(board)
+        return result_board
+
+    def wins(self, mask):
+        return any(mask & line == line for line in self.lines)
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.masks(board)
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return EMPTY
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.masks(board)
+        return self.wins(x) or self.wins(o) or (x | o) == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        player = self.winner(board)
+        return 1 if player == X else -1 if player == O else 0
+
+    def candidates(self, own, opponent):
+        """
+        Returns the empty cells worth searching, nearest the center first.
+        On large boards, only cells next to a stone are searched once
+        there is one.
+        """
+        occupied = own | opponent
+        if not occupied or self.cells <= LOCAL_SEARCH_CELLS:
+            return [cell for cell in self.center_order if not occupied >> cell & 1]
+        near = 0
+        stones = occupied
+        while stones:
+            low = stones & -stones
+            near |= self.neighborhood[low.bit_length() - 1]
+            stones ^= low
+        near &= ~occupied
+        if near != ~occupied & self.full:
+            self.truncated = True
+        return [cell for cell in self.center_order if near >> cell & 1]
+
+    def minimax(self, board, cancel=None):
+        """
+        Returns the best action found for the current player on the board
+        within the time budget, or None if the game is over. Setting the
+        `cancel` event, if given, ends the search like the budget running out.
+
+        Searches one ply deeper at a time, keeping the best move of the
+        last depth that finished, and stops early once a depth was
+        searched without reaching the depth limit anywhere.
+        """
+        if self.terminal(board):
+            return None
+        x, o = self.masks(board)
+        own, opponent = (x, o) if self.player(board) == X else (o, x)
+        self.truncated = False
+        moves = self.candidates(own, opponent)
+        root_truncated = self.truncated
+
+        self.search_stats = {"nodes": 0, "depth": 0}
+        self.deadline = time.monotonic() + self.time_budget
+        self.cancel = cancel
+        best = moves[0]
+        depth = 1
+        max_depth = self.max_depth or (self.cells - count_bits(x | o))
+        while depth <= max_depth:
+            self.truncated = root_truncated
+            try:
+                best, value = self.search_root(own, opponent, moves, depth)
+            except SearchTimeout:
+                break
+            self.search_stats["depth"] = depth
+            # Search the best move first at the next depth
+            moves.remove(best)
+            moves.insert(0, best)
+            if not self.truncated or abs(value) >= self.win_score:
+                break
+            depth += 1
+        return self.action(best)
+
+    def search_root(self, own, opponent, moves, depth):
+        best = None
+        alpha = -math.inf
+        for cell in moves:
+            bit = 1 << cell
+            value = -self.negamax(opponent, own | bit, cell, depth - 1, -math.inf, -alpha)
+            if best is None or value > alpha:
+                alpha = value
+                best = cell
+        return best, alpha
+
+    def negamax(self, own, opponent, last, depth, alpha, beta):
+        """
+        Returns the value of the position for the player owning `own`,
+        who is to move after the opponent played `last`.
+        """
+        self.search_stats["nodes"] += 1
+        if self.search_stats["nodes"] % CHECK_INTERVAL == 0 and (
+            time.monotonic() > self.deadline or (self.cancel and self.cancel.is_set())
+        ):
+            raise SearchTimeout()
+
+        if any(opponent & line == line for line in self.cell_lines[last]):
+            # Sooner losses score lower, so the winner prefers sooner wins
+            return -self.win_score - depth
+        if (own | opponent) == self.full:
+            return 0
+        if depth == 0:
+            self.truncated = True
+            # A guess must never pass for a proven win or loss
+            limit = self.win_score - 1
+            return max(-limit, min(limit, self.heuristic(self, own, opponent)))
+
+        value = -math.inf
+        for cell in self.candidates(own, opponent):
+            value = max(value, -self.negamax(
+                opponent, own | 1 << cell, cell, depth - 1, -beta, -alpha
+            ))
+            if value >= beta:
+                break
+            alpha = max(alpha, value)
+        return value
@@ -1,8 +1,20 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import mnk
 import tictactoe as ttt
+from tictactoe import EMPTY, O, X
+
+# python runner.py rows cols k plays an m,n,k-game instead of Tic Tac Toe
+if len(sys.argv) == 4:
+    game = mnk.Game(*(int(arg) for arg in sys.argv[1:]))
+elif len(sys.argv) == 1:
+    game = ttt
+else:
+    sys.exit("Usage: python runner.py [rows cols k]")
 
 pygame.init()
 size = width, height = 600, 400
@@ -14,19 +26,54 @@ white = (255, 255, 255)
 screen = pygame.display.set_mode(size)
 
 
+# Shortest time the computer appears to think before it moves
+AI_DELAY = 0.5
+
+user = None
+board = game.initial_state()
+rows, cols = len(board), len(board[0])
+
+# Tiles shrink so larger boards still fit below the title
+tile_size = min(80, (height - 120) // rows, (width - 40) // cols)
+
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+# The AI searches in a worker thread while the loop keeps drawing; the
+# loop polls ai_future and sets ai_cancel to abandon a search on reset
+executor = ThreadPoolExecutor(max_workers=1)
+ai_future = None
+ai_cancel = None
+ai_started = 0
+
+
+def think(board, cancel):
+    if isinstance(game, mnk.Game):
+        return game.minimax(board, cancel)
+    return game.minimax(board)
+
+
+def cancel_ai():
+    global ai_future
+    if ai_future is not None:
+        ai_cancel.set()
+        ai_future.cancel()
+        ai_future = None
 
-user = None
-board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai()
+            executor.shutdown(wait=False)
             sys.exit()
+        # R resets the game at any time, even while the computer is thinking
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            cancel_ai()
+            user = None
+            board = game.initial_state()
 
     screen.fill(black)
 
@@ -60,23 +107,22 @@ while True:
             mouse = pygame.mouse.get_pos()
             if playXButton.collidepoint(mouse):
                 time.sleep(0.2)
-                user = ttt.X
+                user = X
             elif playOButton.collidepoint(mouse):
                 time.sleep(0.2)
-                user = ttt.O
+                user = O
 
     else:
 
         # Draw game board
-        tile_size = 80
         tile_origin = (
-            width / 2 - (1.5 * tile_size),
-            height / 2 - (1.5 * tile_size),
+            width / 2 - (cols / 2 * tile_size),
+            height / 2 - (rows / 2 * tile_size),
         )
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -85,7 +131,7 @@ while True:
                 )
                 pygame.draw.rect(screen, white, rect, 3)
 
-                if board[i][j] != ttt.EMPTY:
+                if board[i][j] != EMPTY:
                     move = moveFont.render(board[i][j], True, white)
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
@@ -93,12 +139,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -106,7 +152,8 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = int(time.monotonic() * 3) % 4
+            title = "Computer thinking" + "." * dots + " " * (3 - dots)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
@@ -114,24 +161,25 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_future is None:
+                ai_cancel = threading.Event()
+                ai_future = executor.submit(think, board, ai_cancel)
+                ai_started = time.monotonic()
+            elif ai_future.done() and time.monotonic() - ai_started >= AI_DELAY:
+                move = ai_future.result()
+                ai_future = None
+                board = game.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
-                    if board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(
+            for i in range(rows):
+                for j in range(cols):
+                    if board[i][j] == EMPTY and tiles[i][j].collidepoint(
                         mouse
                     ):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -145,8 +193,8 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    cancel_ai()
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = game.initial_state()
 
     pygame.display.flip()
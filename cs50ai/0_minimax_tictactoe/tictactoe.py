@@ -3,11 +3,55 @@ Tic Tac Toe Player
 """
 
 import math
+from collections import OrderedDict
+
+import bitboard as bb
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Positions searched, and positions answered by the transposition
+# table, during the most recent search; used by benchmark.py
+search_stats = {"nodes": 0, "hits": 0}
+
+# Kinds of transposition table entries: the exact value, or a bound
+# left by an alpha-beta cutoff
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable():
+    """
+    Least-recently-used map from canonical bitboard states to (value, kind),
+    bounded to `size` entries.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value, kind=EXACT):
+        self.entries[key] = (value, kind)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# Shared by every search, so positions are remembered across moves
+transpositions = TranspositionTable(100000)
+
 
 def initial_state():
     """
@@ -24,27 +68,21 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    Xs = 0
-    Os = 0
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == X:
-                Xs += 1
-            elif board[i][j] == O:
-                Os += 1
-    return X if Xs == Os else O
+    return X if bb.x_to_move(bb.from_board(board)) else O
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    available_action = set()
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == EMPTY:
-                available_action.add((i, j))
-    return available_action
+    return state_actions(bb.from_board(board))
+
+
+def state_actions(state):
+    """
+    Returns set of all possible actions (i, j) available in a bitboard state.
+    """
+    return {bb.action(cell) for cell in bb.ROW_MAJOR_MOVES[bb.empty_mask(state)]}
 
 
 def result(board, action):
@@ -56,35 +94,18 @@ def result(board, action):
     if i > 2 or i < 0 or j > 2 or j < 0 or board[i][j] != EMPTY:
         raise Exception("Invalid move")
 
-    result_board = [row[:] for row in board]
-    result_board[i][j] = player(board)
-    return result_board
+    return bb.to_board(bb.result(bb.from_board(board), bb.cell(action)))
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    winning_positions = [
-        [(0, 0), (0, 1), (0, 2)],
-        [(1, 0), (1, 1), (1, 2)],
-        [(2, 0), (2, 1), (2, 2)],
-        [(0, 0), (1, 0), (2, 0)],
-        [(0, 1), (1, 1), (2, 1)],
-        [(0, 2), (1, 2), (2, 2)],
-        [(0, 0), (1, 1), (2, 2)],
-        [(2, 0), (1, 1), (0, 2)],
-    ]
-    for player in [X, O]:
-        for winning_pos in winning_positions:
-            player_wins = True
-            for cell in winning_pos:
-                i, j = cell
-                if board[i][j] != player:
-                    player_wins = False
-                    break
-            if player_wins:
-                return player
+    state = bb.from_board(board)
+    if bb.x_wins(state):
+        return X
+    if bb.o_wins(state):
+        return O
     return EMPTY
 
 
@@ -92,54 +113,200 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) in [X, O]:
-        return True
-    empties = 0
-    for i in range(len(board)):
-        if empties != 0:
-            break
-        for j in range(len(board[i])):
-            if board[i][j] == EMPTY:
-                empties = 1
-                break
-    return empties == 0
+    return bb.terminal(bb.from_board(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    player = winner(board)
-    if player == X:
-        return 1
-    elif player == O:
-        return -1
+    return bb.utility(bb.from_board(board))
+
+
+def lookup(key, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the stored value of a position if it settles the search
+    within (alpha, beta), None otherwise.
+    """
+    entry = transpositions.get(key)
+    if entry is None:
+        return None
+    value, kind = entry
+    if kind == EXACT or (kind == LOWER and value >= beta) or (kind == UPPER and value <= alpha):
+        search_stats["hits"] += 1
+        return value
+    return None
+
+
+def store(key, value, alpha=-math.inf, beta=math.inf):
+    """
+    Stores the value a search with window (alpha, beta) returned.
+    """
+    if value <= alpha:
+        transpositions.put(key, value, UPPER)
+    elif value >= beta:
+        transpositions.put(key, value, LOWER)
     else:
-        return 0
+        transpositions.put(key, value, EXACT)
+
+
+def reset_search_stats():
+    for counter in search_stats:
+        search_stats[counter] = 0
 
 
 def min_value(board):
-    if terminal(board):
-        return utility(board)
+    return state_min_value(bb.from_board(board))
+
+
+def max_value(board):
+    return state_max_value(bb.from_board(board))
+
+
+def state_min_value(state):
+    """
+    Returns the exact value of a bitboard state with O to move,
+    searching every line of play. The transposition table is left out
+    on purpose, so this stays the unpruned, unmemoized reference search.
+    """
+    search_stats["nodes"] += 1
+    if bb.terminal(state):
+        return bb.utility(state)
     value = math.inf
-    for action in actions(board):
-        value = min(value, max_value(result(board, action)))
+    for cell in bb.ROW_MAJOR_MOVES[bb.empty_mask(state)]:
+        value = min(value, state_max_value(bb.result(state, cell)))
     return value
 
 
-def max_value(board):
-    if terminal(board):
-        return utility(board)
+def state_max_value(state):
+    """
+    Returns the exact value of a bitboard state with X to move,
+    searching every line of play. The transposition table is left out
+    on purpose, so this stays the unpruned, unmemoized reference search.
+    """
+    search_stats["nodes"] += 1
+    if bb.terminal(state):
+        return bb.utility(state)
     value = -math.inf
-    for action in actions(board):
-        value = max(value, min_value(result(board, action)))
+    for cell in bb.ROW_MAJOR_MOVES[bb.empty_mask(state)]:
+        value = max(value, state_min_value(bb.result(state, cell)))
+    return value
+
+
+def alpha_beta_min(state, alpha, beta):
+    """
+    Returns the value of a bitboard state with O to move, exact when it
+    lies strictly between alpha and beta and a bound on the pruned side otherwise.
+    """
+    key = bb.canonical(state)
+    value = lookup(key, alpha, beta)
+    if value is not None:
+        return value
+    search_stats["nodes"] += 1
+    if bb.terminal(state):
+        value = bb.utility(state)
+        store(key, value)
+        return value
+    window = (alpha, beta)
+    value = math.inf
+    for cell in bb.moves(state):
+        value = min(value, alpha_beta_max(bb.result(state, cell), alpha, beta))
+        if value <= alpha:
+            break
+        beta = min(beta, value)
+    store(key, value, *window)
+    return value
+
+
+def alpha_beta_max(state, alpha, beta):
+    """
+    Returns the value of a bitboard state with X to move, exact when it
+    lies strictly between alpha and beta and a bound on the pruned side otherwise.
+    """
+    key = bb.canonical(state)
+    value = lookup(key, alpha, beta)
+    if value is not None:
+        return value
+    search_stats["nodes"] += 1
+    if bb.terminal(state):
+        value = bb.utility(state)
+        store(key, value)
+        return value
+    window = (alpha, beta)
+    value = -math.inf
+    for cell in bb.moves(state):
+        value = max(value, alpha_beta_min(bb.result(state, cell), alpha, beta))
+        if value >= beta:
+            break
+        alpha = max(alpha, value)
+    store(key, value, *window)
     return value
 
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+
+    The move is read from the opening book when one is available, and
+    searched for otherwise.
+    """
+    reset_search_stats()
+    state = bb.from_board(board)
+    if bb.terminal(state):
+        return None
+    entry = book.lookup(state)
+    if entry is None:
+        entry = search_state(state)
+    return bb.action(entry[0])
+
+
+def minimax_search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    always searching with alpha-beta instead of reading the book.
+    """
+    reset_search_stats()
+    state = bb.from_board(board)
+    if bb.terminal(state):
+        return None
+    return bb.action(search_state(state)[0])
+
+
+def search_state(state):
+    """
+    Returns (cell, value) of the optimal move in a non-terminal bitboard state.
+    """
+    # The root walks actions() in the same order as minimax_exhaustive and
+    # keeps the first strictly better action, so both pick the same move:
+    # a child cut off by the window can only tie or lose to the best so far.
+    if bb.x_to_move(state):
+        highest_value = -math.inf
+        highest_action = None
+        for action in state_actions(state):
+            result_state = bb.result(state, bb.cell(action))
+            result_value = alpha_beta_min(result_state, highest_value, math.inf)
+            if result_value > highest_value:
+                highest_value = result_value
+                highest_action = action
+        return bb.cell(highest_action), highest_value
+    else:
+        lowest_value = math.inf
+        lowest_action = None
+        for action in state_actions(state):
+            result_state = bb.result(state, bb.cell(action))
+            result_value = alpha_beta_max(result_state, -math.inf, lowest_value)
+            if result_value < lowest_value:
+                lowest_value = result_value
+                lowest_action = action
+        return bb.cell(lowest_action), lowest_value
+
+
+def minimax_exhaustive(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the full game tree without pruning.
     """
+    reset_search_stats()
     if terminal(board):
         return None
 
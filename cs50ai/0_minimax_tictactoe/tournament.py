@@ -0,0 +1,131 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+import mnk
+import tictactoe as ttt
+
+# Which search the AI plays with
+ENGINES = {
+    "book": ttt.minimax,
+    "search": ttt.minimax_search,
+    "exhaustive": ttt.minimax_exhaustive,
+}
+ENGINE_NAMES = list(ENGINES) + ["mnk"]
+
+# (X, O) players of each kind of game
+MATCHUPS = [("ai", "ai"), ("ai", "random"), ("random", "ai")]
+
+
+def engine(name):
+    """
+    Returns the minimax of an engine name, and a function returning
+    how many nodes its last search visited.
+    """
+    if name == "mnk":
+        game = mnk.Game(3, 3, 3)
+        return game.minimax, lambda: game.search_stats["nodes"]
+    return ENGINES[name], lambda: ttt.search_stats["nodes"]
+
+
+def play_game(task):
+    """
+    Plays one headless game and returns its result, with the latency
+    and node count of every AI move.
+    """
+    seed, (x_kind, o_kind), engine_name = task
+    rng = random.Random(seed)
+    minimax, searched = engine(engine_name)
+
+    board = ttt.initial_state()
+    latencies = []
+    nodes = []
+    while not ttt.terminal(board):
+        kind = x_kind if ttt.player(board) == ttt.X else o_kind
+        if kind == "ai":
+            start = time.perf_counter()
+            move = minimax(board)
+            latencies.append(time.perf_counter() - start)
+            nodes.append(searched())
+        else:
+            move = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, move)
+
+    return {
+        "matchup": (x_kind, o_kind),
+        "winner": ttt.winner(board),
+        "latencies": latencies,
+        "nodes": nodes,
+    }
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which `fraction` of the sorted `values` fall.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def ai_lost(game):
+    """
+    Returns True if the AI lost, or failed to draw against itself.
+    """
+    x_kind, o_kind = game["matchup"]
+    if x_kind == o_kind == "ai":
+        return game["winner"] is not None
+    ai_player = ttt.X if x_kind == "ai" else ttt.O
+    return game["winner"] not in (None, ai_player)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python tournament.py [--games N] [--engine NAME] [--workers N] [--seed N]"
+    )
+    parser.add_argument("--games", type=int, default=3000, help="games per run, split over the matchups")
+    parser.add_argument("--engine", choices=ENGINE_NAMES, default="book")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tasks = [
+        (args.seed + i, MATCHUPS[i % len(MATCHUPS)], args.engine)
+        for i in range(args.games)
+    ]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        games = list(pool.imap_unordered(play_game, tasks, chunksize=32))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for game in games for latency in game["latencies"])
+    nodes = [count for game in games for count in game["nodes"]]
+    print(f"Engine: {args.engine}")
+    print(f"Games: {len(games)} in {elapsed:.2f}s ({len(games) / elapsed:.0f} games/sec)")
+    print(f"AI moves: {len(latencies)}, {sum(nodes) / max(len(nodes), 1):.1f} nodes per move")
+    print(
+        "Move latency: "
+        + ", ".join(
+            f"p{int(fraction * 100)} {percentile(latencies, fraction) * 1000:.3f}ms"
+            for fraction in (0.5, 0.9, 0.99)
+        )
+        + f", max {percentile(latencies, 1.0) * 1000:.3f}ms"
+    )
+    for matchup in MATCHUPS:
+        results = [game["winner"] for game in games if game["matchup"] == matchup]
+        summary = ", ".join(
+            f"{label} {results.count(winner)}"
+            for label, winner in (("X wins", ttt.X), ("O wins", ttt.O), ("ties", None))
+        )
+        print(f"{matchup[0]} (X) vs {matchup[1]} (O): {summary}")
+
+    losses = sum(ai_lost(game) for game in games)
+    if losses:
+        sys.exit(f"The AI lost {losses} games.")
+    print("The AI never lost.")
+
+
+if __name__ == "__main__":
+    main()
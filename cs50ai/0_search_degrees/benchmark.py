@@ -0,0 +1,63 @@
+import random
+import sys
+import time
+
+import degrees
+from graph import load_graph
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python benchmark.py directory [queries]")
+    directory = sys.argv[1]
+    queries = int(sys.argv[2]) if len(sys.argv) == 3 else 100
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    graph = load_graph(directory)
+    index = degrees.load_landmarks(directory)
+    print("Data loaded.")
+
+    random.seed(0)
+    person_ids = sorted(degrees.people)
+    pairs = [
+        (random.choice(person_ids), random.choice(person_ids))
+        for _ in range(queries)
+    ]
+
+    searches = [
+        ("bfs", degrees.shortest_path, degrees.search_stats),
+        ("bidirectional", degrees.shortest_path_bidirectional, degrees.search_stats),
+        ("compact bfs", graph.shortest_path, graph.search_stats),
+        (
+            "landmark a*",
+            lambda source, target: degrees.shortest_path_astar(source, target, index),
+            degrees.search_stats,
+        ),
+    ]
+    lengths = {}
+    for name, search, stats in searches:
+        expanded = 0
+        neighbor_pairs = 0
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = search(source, target)
+            expanded += stats["expanded"]
+            neighbor_pairs += stats["pairs"]
+            lengths.setdefault((source, target), set()).add(
+                None if path is None else len(path)
+            )
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>14}: {expanded} nodes expanded, "
+            f"{expanded / queries:.1f} per query, "
+            f"{neighbor_pairs / queries:.1f} neighbour pairs per query, {elapsed:.3f}s"
+        )
+
+    mismatches = [pair for pair, found in lengths.items() if len(found) > 1]
+    if mismatches:
+        sys.exit(f"{len(mismatches)} queries returned paths of different lengths")
+
+
+if __name__ == "__main__":
+    main()
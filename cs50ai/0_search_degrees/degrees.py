@@ -1,6 +1,15 @@
-import csv
+import argparse
+import heapq
+import json
+import multiprocessing
+import re
 import sys
 
+from graph import graph_from_data, load_graph
+from ingest import dropped, format_stats, read_rows
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from snapshot import read_snapshot, write_snapshot
 from util import Node, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,64 +21,237 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, set instead of the dicts above by
+# load_data(directory, compact=True)
+graph = None
 
-def load_data(directory):
+# Sorted index over person names for prefix and fuzzy search,
+# built by get_name_index on first use and dropped by load_data
+name_index = None
+
+# Per-file ingest metrics of the last CSV load, filled by ingest.read_rows
+load_stats = {}
+
+# Counters for the most recent search, used by benchmark.py
+# "expanded" counts people whose neighbours were fetched, "pairs" the
+# (movie_id, person_id) pairs those fetches produced
+search_stats = {"expanded": 0, "pairs": 0}
+
+
+def load_data(directory, compact=False, cache=True):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is loaded into the integer-indexed `graph`
+    instead of the `names`, `people` and `movies` dicts.
+
+    With `cache`, a binary snapshot is written next to the CSV files on
+    the first load, and later loads memory-map it instead of parsing the
+    CSV files for as long as they are unchanged.
     """
+    global graph, name_index
+    load_stats.clear()
+    name_index = None
+    snapshot = read_snapshot(directory) if cache else None
+    if compact:
+        if snapshot is None:
+            snapshot = load_graph(directory, load_stats)
+            if cache:
+                save_snapshot(directory, snapshot)
+        graph = snapshot
+        return
+    if snapshot is not None:
+        load_snapshot_data(snapshot)
+        return
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set(),
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    path = f"{directory}/people.csv"
+    for person_id, name, birth in read_rows(path, ("id", "name", "birth"), load_stats):
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set(),
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set(),
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    path = f"{directory}/movies.csv"
+    for movie_id, title, year in read_rows(path, ("id", "title", "year"), load_stats):
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set(),
+        }
+
+    # Load stars, dropping rows that name an unknown person or movie
+    path = f"{directory}/stars.csv"
+    for person_id, movie_id in read_rows(path, ("person_id", "movie_id"), load_stats):
+        person = people.get(person_id)
+        movie = movies.get(movie_id)
+        if person is None or movie is None:
+            dropped(load_stats, path)
+            continue
+        person["movies"].add(movie_id)
+        movie["stars"].add(person_id)
+
+    if cache:
+        save_snapshot(directory, graph_from_data(people, movies))
+
+
+def get_name_index():
+    """
+    Returns `name_index`, building it over whichever store load_data
+    filled the first time it is needed. Exact lookups do not need it.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            entries = zip(graph.person_ids, graph.person_names)
+        else:
+            entries = ((person_id, person["name"]) for person_id, person in people.items())
+        name_index = NameIndex(entries, movie_count)
+    return name_index
+
+
+def load_snapshot_data(snapshot):
+    """
+    Fill the `names`, `people` and `movies` dicts from a snapshot graph.
+    """
+    for p, person_id in enumerate(snapshot.person_ids):
+        name = snapshot.person_names[p]
+        people[person_id] = {
+            "name": name,
+            "birth": snapshot.person_births[p],
+            "movies": {snapshot.movie_ids[m] for m in snapshot.movies_of(p)},
+        }
+        names.setdefault(name.lower(), set()).add(person_id)
+    for m, movie_id in enumerate(snapshot.movie_ids):
+        movies[movie_id] = {
+            "title": snapshot.movie_titles[m],
+            "year": snapshot.movie_years[m],
+            "stars": {snapshot.person_ids[p] for p in snapshot.cast_of(m)},
+        }
+
+
+def save_snapshot(directory, snapshot):
+    """
+    Writes the snapshot, carrying on without it if the directory is read-only.
+    """
+    try:
+        write_snapshot(directory, snapshot)
+    except OSError as e:
+        print(f"Could not write snapshot: {e}", file=sys.stderr)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage=(
+            "python degrees.py [directory] [--bidirectional] [--compact] [--no-cache]"
+            " [--batch FILE [--workers N]] [--landmarks [--degrees-only]] [--stats]"
+        )
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--bidirectional",
+        action="store_true",
+        help="search from both source and target until the frontiers meet",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="load the data into a compact integer-indexed graph",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse the CSV files, without reading or writing a snapshot",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="answer tab-separated source/target lines from FILE ('-' for stdin) as JSON lines",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes used by --batch (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--landmarks",
+        action="store_true",
+        help="search with A* over a landmark distance index saved next to the data",
+    )
+    parser.add_argument(
+        "--degrees-only",
+        action="store_true",
+        help="with --landmarks, print distance bounds without searching",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="report rows/sec, dropped rows and peak memory for each CSV file read",
+    )
+    args = parser.parse_args()
+    directory = args.directory
+    if args.landmarks and args.compact:
+        parser.error("--landmarks cannot be combined with --compact")
+    if args.bidirectional and args.compact:
+        parser.error("--bidirectional cannot be combined with --compact")
+    if args.degrees_only and not args.landmarks:
+        parser.error("--degrees-only requires --landmarks")
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    load_data(directory, compact=args.compact, cache=not args.no_cache)
+    print("Data loaded.", file=log)
+    if args.stats:
+        if not load_stats:
+            print("Loaded from snapshot, no CSV files read.", file=log)
+        for line in format_stats(load_stats):
+            print(line, file=log)
 
-    source = person_id_for_name(input("Name: "))
+    if args.batch:
+        if args.batch == "-":
+            queries = read_queries(sys.stdin)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                queries = read_queries(f)
+        for answer in run_batch(queries, args.workers):
+            print(json.dumps(answer))
+        return
+
+    name, birth = split_birth(input("Name: "))
+    source = person_id_for_name(name, birth=birth)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name, birth = split_birth(input("Name: "))
+    target = person_id_for_name(name, birth=birth)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
-    path = shortest_path(source, target)
+    if args.landmarks:
+        index = load_landmarks(directory)
+        if args.degrees_only:
+            bounds = degrees_only(source, target, index)
+            if bounds is None:
+                print("Not connected.")
+            else:
+                lower, upper = bounds
+                upper = "unknown" if upper is None else upper
+                print(f"Between {lower} and {upper} degrees of separation.")
+            return
+        path = shortest_path_astar(source, target, index)
+    elif graph is not None:
+        path = graph.shortest_path(source, target)
+    elif args.bidirectional:
+        path = shortest_path_bidirectional(source, target)
+    else:
+        path = shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,9 +260,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_for_id(path[i][1])["name"]
+            person2 = person_for_id(path[i + 1][1])["name"]
+            movie = movie_for_id(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -92,11 +274,13 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
 
+    reset_search_stats()
     if source == target:
         return []
 
     queue = QueueFrontier()
     stars_visited = set()
+    movies_seen = set()
 
     queue.add(Node(source, None, None))
     stars_visited.add(source)
@@ -109,7 +293,8 @@ def shortest_path(source, target):
             final_node = node
             break
 
-        neighbors = neighbors_for_person(node.state)
+        neighbors = iter_neighbors(node.state, movies_seen)
+        search_stats["expanded"] += 1
         for neighbor in neighbors:
             movie_id, person_id = neighbor
             if person_id in stars_visited:
@@ -131,18 +316,353 @@ def shortest_path(source, target):
     return list(reversed(path)) if path else None
 
 
-def person_id_for_name(name):
+def shortest_path_bidirectional(source, target):
+    """
+    Same result as shortest_path, but grows one BFS frontier from the
+    source and another from the target, always expanding the smaller
+    one a whole level at a time, and stops when the two meet.
+
+    If no possible path, returns None.
+    """
+    reset_search_stats()
+    if source == target:
+        return []
+
+    # person_id -> (movie_id, person_id one step closer to that side's root)
+    forward = {source: None}
+    backward = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    forward_movies = set()
+    backward_movies = set()
+
+    while forward_frontier and backward_frontier:
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, depth = forward_frontier, forward, forward_depth
+            other_depth, movies_seen = backward_depth, forward_movies
+        else:
+            frontier, parents, depth = backward_frontier, backward, backward_depth
+            other_depth, movies_seen = forward_depth, backward_movies
+
+        # Expand the whole level so the best meeting point is not missed
+        next_frontier = []
+        meeting = None
+        best = None
+        for person_id in frontier:
+            search_stats["expanded"] += 1
+            for movie_id, neighbor_id in iter_neighbors(person_id, movies_seen):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                depth[neighbor_id] = depth[person_id] + 1
+                next_frontier.append(neighbor_id)
+                if neighbor_id in other_depth:
+                    length = depth[neighbor_id] + other_depth[neighbor_id]
+                    if best is None or length < best:
+                        best = length
+                        meeting = neighbor_id
+
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting)
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds the (movie_id, person_id) path through `meeting` from the
+    parent pointers of a bidirectional search.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
+
+
+def load_landmarks(directory, count=32):
+    """
+    Returns the landmark index saved next to the data in `directory`,
+    building and saving it first if it is missing or out of date.
+    """
+    person_ids = list(people)
+    index = LandmarkIndex.load(directory, person_ids)
+    if index is None:
+        index = LandmarkIndex.build(
+            person_ids, iter_neighbors, person_degree, count
+        )
+        try:
+            index.save(directory)
+        except OSError as e:
+            print(f"Could not write landmark index: {e}", file=sys.stderr)
+    return index
+
+
+def person_degree(person_id):
+    """
+    Returns how many (movie, co-star) pairs a person has,
+    counting the person once per movie.
+    """
+    return sum(len(movies[movie_id]["stars"]) for movie_id in people[person_id]["movies"])
+
+
+def shortest_path_astar(source, target, index):
+    """
+    Same result as shortest_path, but expands people in order of
+    degrees so far plus the landmark lower bound to the target.
+
+    If no possible path, returns None.
+    """
+    reset_search_stats()
+    if source == target:
+        return []
+    lower_bound = index.bounds_to(target)
+    estimate = lower_bound(source)
+    if estimate is None:
+        return None
+
+    # person_id -> (movie_id, parent person_id)
+    parents = {source: None}
+    depth = {source: 0}
+    expanded = set()
+    # Ties on the estimate prefer the deeper person, who is closer to the target
+    queue = [(estimate, 0, source)]
+    while queue:
+        _, negative_depth, person_id = heapq.heappop(queue)
+        if person_id in expanded:
+            continue
+        if person_id == target:
+            break
+        expanded.add(person_id)
+        search_stats["expanded"] += 1
+        next_depth = -negative_depth + 1
+        # A* does not expand people in depth order, so a movie's cast
+        # may be reached more cheaply later and cannot be skipped here
+        neighbors = neighbors_for_person(person_id)
+        search_stats["pairs"] += len(neighbors)
+        for movie_id, neighbor_id in neighbors:
+            if neighbor_id in depth and depth[neighbor_id] <= next_depth:
+                continue
+            estimate = lower_bound(neighbor_id)
+            if estimate is None:
+                continue
+            depth[neighbor_id] = next_depth
+            parents[neighbor_id] = (movie_id, person_id)
+            heapq.heappush(queue, (next_depth + estimate, -next_depth, neighbor_id))
+    else:
+        return None
+
+    path = []
+    person_id = target
+    while parents[person_id] is not None:
+        movie_id, parent_id = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+    return path
+
+
+def degrees_only(source, target, index):
+    """
+    Returns (lower, upper) bounds on the degrees of separation from the
+    landmark index alone, where upper may be None if no landmark reaches
+    both people. Returns None if the index proves they are not connected.
+    """
+    if source == target:
+        return 0, 0
+    lower = index.lower_bound(source, target)
+    if lower is None:
+        return None
+    return max(lower, 1), index.upper_bound(source, target)
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dict mapping each of `targets` to the shortest list of
+    (movie_id, person_id) pairs that connect the source to it, or None.
+
+    A single BFS tree is grown from the source until every target has
+    been reached, so many targets cost no more than the farthest one.
+    """
+    if graph is not None:
+        return graph.shortest_paths_from(source, targets)
+
+    remaining = set(targets)
+    remaining.discard(source)
+    # person_id -> (movie_id, parent person_id)
+    parents = {source: None}
+    movies_seen = set()
+    frontier = [source]
+    while frontier and remaining:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in iter_neighbors(person_id, movies_seen):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                remaining.discard(neighbor_id)
+                next_frontier.append(neighbor_id)
+        frontier = next_frontier
+
+    paths = {}
+    for target in targets:
+        if target not in parents:
+            paths[target] = None
+            continue
+        path = []
+        person_id = target
+        while parents[person_id] is not None:
+            movie_id, parent_id = parents[person_id]
+            path.append((movie_id, person_id))
+            person_id = parent_id
+        path.reverse()
+        paths[target] = path
+    return paths
+
+
+def read_queries(lines):
+    """
+    Parses "source<TAB>target" lines, skipping blank ones.
+    Each side may be a person_id or a name.
+    """
+    queries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        source, _, target = line.partition("\t")
+        queries.append((source.strip(), target.strip()))
+    return queries
+
+
+def resolve_person(query):
+    """
+    Non-interactively resolves a person_id or name to a person_id.
+    Returns (person_id, None) or (None, error message).
+    """
+    if query in (graph.person_index if graph is not None else people):
+        return query, None
+    name, birth = split_birth(query)
+    person_id = person_id_for_name(name, interactive=False, birth=birth)
+    if person_id is None:
+        return None, f"{query}: {not_found_message(name)}"
+    return person_id, None
+
+
+def split_birth(query):
+    """
+    Splits an optional birth year off a name, as in "Kevin Bacon (1958)".
+    Returns (name, birth), where birth is None if there is no year.
+    """
+    match = re.fullmatch(r"\s*(.*?)\s*\((\d{4})\)\s*", query)
+    if match:
+        return match.group(1), match.group(2)
+    return query.strip(), None
+
+
+def not_found_message(name):
+    """
+    Returns a "Person not found." message suggesting close names, if any.
+    """
+    suggestions = get_name_index().fuzzy(name, limit=3)
+    if not suggestions:
+        return "Person not found."
+    close = ", ".join(f"{match} (ID: {person_id})" for person_id, match, _ in suggestions)
+    return f"Person not found. Did you mean: {close}?"
+
+
+def answer_source(query):
+    """
+    Pool task: answers every target of one source from a single BFS tree.
+    """
+    source, targets = query
+    return source, shortest_paths_from(source, targets)
+
+
+def run_batch(queries, workers=None):
+    """
+    Answers (source, target) queries, grouping them by source so each
+    distinct source is searched once, and spreading the sources over a
+    process pool. Returns one JSON-serialisable dict per query, in order.
+    """
+    answers = []
+    targets_by_source = {}
+    for source_query, target_query in queries:
+        source, error = resolve_person(source_query)
+        target = None
+        if error is None:
+            target, error = resolve_person(target_query)
+        answer = {"source": source_query, "target": target_query}
+        if error is not None:
+            answer["error"] = error
+        else:
+            targets = targets_by_source.setdefault(source, [])
+            if target not in targets:
+                targets.append(target)
+        answers.append((answer, source, target))
+
+    groups = list(targets_by_source.items())
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if workers == 1 or len(groups) <= 1 or not can_fork:
+        results = dict(map(answer_source, groups))
+    else:
+        # Workers are forked after load_data, so they share the loaded graph
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            results = dict(pool.imap_unordered(answer_source, groups, chunksize=8))
+
+    output = []
+    for answer, source, target in answers:
+        if "error" not in answer:
+            path = results[source][target]
+            answer["source_id"] = source
+            answer["target_id"] = target
+            answer["degrees"] = None if path is None else len(path)
+            answer["path"] = path
+        output.append(answer)
+    return output
+
+
+def person_id_for_name(name, interactive=True, birth=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If `birth` is given, only people born that year match. Remaining
+    ambiguities are asked about when `interactive`, and otherwise
+    resolved to the person who starred in the most movies.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
+    if birth is not None:
+        person_ids = [
+            person_id for person_id in person_ids
+            if person_for_id(person_id)["birth"] == str(birth)
+        ]
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and not interactive:
+        return min(person_ids, key=lambda person_id: (-movie_count(person_id), person_id))
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_for_id(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -157,6 +677,67 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns the person_ids with exactly this name, ignoring case.
+    """
+    if graph is not None:
+        return graph.person_ids_for_name(name)
+    return list(names.get(name.lower(), set()))
+
+
+def person_for_id(person_id):
+    """
+    Returns the name and birth of a person from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_count(person_id):
+    """
+    Returns how many movies a person starred in.
+    """
+    if graph is not None:
+        p = graph.person_index[person_id]
+        return graph.person_offsets[p + 1] - graph.person_offsets[p]
+    return len(people[person_id]["movies"])
+
+
+def movie_for_id(movie_id):
+    """
+    Returns the title and year of a movie from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
+def iter_neighbors(person_id, movies_seen):
+    """
+    Lazily yields (movie_id, person_id) pairs for people who starred
+    with a given person, like neighbors_for_person.
+
+    Movies in `movies_seen` are skipped and the others are added to it,
+    so a breadth-first search expands each movie's cast at most once:
+    the first person to reach a movie is also the closest to the source.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if movie_id in movies_seen:
+            continue
+        movies_seen.add(movie_id)
+        stars = movies[movie_id]["stars"]
+        search_stats["pairs"] += len(stars)
+        for star_id in stars:
+            yield movie_id, star_id
+
+
+def reset_search_stats():
+    for counter in search_stats:
+        search_stats[counter] = 0
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -0,0 +1,303 @@
+from array import array
+
+from ingest import dropped, read_rows
+
+
+class Graph():
+    """
+    Compact person <-> movie graph.
+
+    Person and movie ids are interned to dense integers, and the bipartite
+    graph is stored twice in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` and the cast
+    of movie `m` is `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(movie_ids)
+        }
+        self.search_stats = {"expanded": 0, "pairs": 0}
+        self.name_index = {}
+        for i, name in enumerate(person_names):
+            self.name_index.setdefault(name.lower(), []).append(i)
+
+    def person_count(self):
+        return len(self.person_ids)
+
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    def person(self, person_id):
+        """
+        Returns a dictionary of: name, birth for a person_id.
+        """
+        i = self.person_index[person_id]
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary of: title, year for a movie_id.
+        """
+        i = self.movie_index[movie_id]
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the list of person_ids with the given (case-insensitive) name.
+        """
+        return [self.person_ids[i] for i in self.name_index.get(name.lower(), [])]
+
+    def movies_of(self, p):
+        """
+        Returns the slice of movie indices person index `p` starred in.
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def cast_of(self, m):
+        """
+        Returns the slice of person indices that starred in movie index `m`.
+        """
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with person index `p`.
+        """
+        for m in self.movies_of(p):
+            for q in self.cast_of(m):
+                yield m, q
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, as degrees.shortest_path does.
+
+        If no possible path, returns None.
+        """
+        self.search_stats["expanded"] = 0
+        self.search_stats["pairs"] = 0
+        if source == target:
+            return []
+        start = self.person_index[source]
+        goal = self.person_index[target]
+
+        # parent_person[p] == -1 means p has not been reached yet
+        parent_person = array("i", [-1]) * self.person_count()
+        parent_movie = array("i", [-1]) * self.person_count()
+        parent_person[start] = start
+        # Each movie's cast is expanded at most once per search
+        movie_seen = bytearray(self.movie_count())
+
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                self.search_stats["expanded"] += 1
+                for m in self.movies_of(p):
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    cast = self.cast_of(m)
+                    self.search_stats["pairs"] += len(cast)
+                    for q in cast:
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        if q == goal:
+                            return self._path(parent_person, parent_movie, start, goal)
+                        next_frontier.append(q)
+            frontier = next_frontier
+        return None
+
+    def shortest_paths_from(self, source, targets):
+        """
+        Returns a dict mapping each of `targets` to its shortest path from
+        the source, as degrees.shortest_paths_from does, from one BFS tree.
+        """
+        start = self.person_index[source]
+        remaining = {self.person_index[target] for target in targets}
+        remaining.discard(start)
+
+        parent_person = array("i", [-1]) * self.person_count()
+        parent_movie = array("i", [-1]) * self.person_count()
+        parent_person[start] = start
+        movie_seen = bytearray(self.movie_count())
+
+        frontier = [start]
+        while frontier and remaining:
+            next_frontier = []
+            for p in frontier:
+                for m in self.movies_of(p):
+                    if movie_seen[m]:
+                        continue
+                    movie_seen[m] = 1
+                    for q in self.cast_of(m):
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        remaining.discard(q)
+                        next_frontier.append(q)
+            frontier = next_frontier
+
+        paths = {}
+        for target in targets:
+            goal = self.person_index[target]
+            if parent_person[goal] == -1:
+                paths[target] = None
+            else:
+                paths[target] = self._path(parent_person, parent_movie, start, goal)
+        return paths
+
+    def _path(self, parent_person, parent_movie, start, goal):
+        path = []
+        p = goal
+        while p != start:
+            path.append((self.movie_ids[parent_movie[p]], self.person_ids[p]))
+            p = parent_person[p]
+        path.reverse()
+        return path
+
+
+def build_csr(pairs, rows):
+    """
+    Given a sorted, de-duplicated iterable of (row, column) pairs,
+    returns (offsets, indices) arrays for `rows` rows.
+    """
+    offsets = array("i", [0]) * (rows + 1)
+    indices = array("i")
+    for row, column in pairs:
+        offsets[row + 1] += 1
+        indices.append(column)
+    for row in range(rows):
+        offsets[row + 1] += offsets[row]
+    return offsets, indices
+
+
+def graph_from_data(people, movies):
+    """
+    Builds a compact Graph from the `people` and `movies` dicts
+    filled by degrees.load_data.
+    """
+    person_ids = list(people)
+    movie_ids = list(movies)
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+    person_offsets, person_movies = build_csr(
+        (
+            (p, m)
+            for p, person_id in enumerate(person_ids)
+            for m in sorted(
+                movie_index[movie_id] for movie_id in people[person_id]["movies"]
+                if movie_id in movie_index
+            )
+        ),
+        len(person_ids),
+    )
+    movie_offsets, movie_people = build_csr(
+        (
+            (m, p)
+            for m, movie_id in enumerate(movie_ids)
+            for p in sorted(
+                person_index[person_id] for person_id in movies[movie_id]["stars"]
+                if person_id in person_index
+            )
+        ),
+        len(movie_ids),
+    )
+
+    return Graph(
+        person_ids,
+        [people[person_id]["name"] for person_id in person_ids],
+        [people[person_id]["birth"] for person_id in person_ids],
+        movie_ids,
+        [movies[movie_id]["title"] for movie_id in movie_ids],
+        [movies[movie_id]["year"] for movie_id in movie_ids],
+        person_offsets, person_movies, movie_offsets, movie_people,
+    )
+
+
+def load_graph(directory, stats=None):
+    """
+    Load data from CSV files into a compact Graph.
+
+    Per-file ingest metrics are recorded into `stats` if given.
+    """
+    if stats is None:
+        stats = {}
+
+    person_ids = []
+    person_names = []
+    person_births = []
+    person_index = {}
+    path = f"{directory}/people.csv"
+    for person_id, name, birth in read_rows(path, ("id", "name", "birth"), stats):
+        if person_id in person_index:
+            dropped(stats, path)
+            continue
+        person_index[person_id] = len(person_ids)
+        person_ids.append(person_id)
+        person_names.append(name)
+        person_births.append(birth)
+
+    movie_ids = []
+    movie_titles = []
+    movie_years = []
+    movie_index = {}
+    path = f"{directory}/movies.csv"
+    for movie_id, title, year in read_rows(path, ("id", "title", "year"), stats):
+        if movie_id in movie_index:
+            dropped(stats, path)
+            continue
+        movie_index[movie_id] = len(movie_ids)
+        movie_ids.append(movie_id)
+        movie_titles.append(title)
+        movie_years.append(year)
+
+    # Encode each (person, movie) edge as one integer so duplicates
+    # collapse and sorting groups edges by person
+    movie_count = len(movie_ids)
+    edges = set()
+    path = f"{directory}/stars.csv"
+    for person_id, movie_id in read_rows(path, ("person_id", "movie_id"), stats):
+        p = person_index.get(person_id)
+        m = movie_index.get(movie_id)
+        if p is None or m is None:
+            dropped(stats, path)
+            continue
+        edges.add(p * movie_count + m)
+    edges = sorted(edges)
+
+    person_offsets, person_movies = build_csr(
+        (divmod(edge, movie_count) for edge in edges), len(person_ids)
+    )
+    movie_offsets, movie_people = build_csr(
+        sorted((m, p) for p, m in (divmod(edge, movie_count) for edge in edges)),
+        movie_count,
+    )
+
+    return Graph(
+        person_ids, person_names, person_births,
+        movie_ids, movie_titles, movie_years,
+        person_offsets, person_movies, movie_offsets, movie_people,
+    )
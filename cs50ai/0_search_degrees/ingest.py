@@ -0,0 +1,80 @@
+import csv
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Bytes read from disk at a time while parsing
+CHUNK_SIZE = 1 << 20
+
+
+def peak_rss():
+    """
+    Returns the peak resident memory of the process so far in bytes,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_rows(path, columns, stats):
+    """
+    Yields a tuple of the named `columns` for every row of a CSV file,
+    parsed with csv.reader over large buffered reads.
+
+    Counts rows into `stats[path]`, along with rows dropped because they
+    are too short; callers add their own drops through `dropped(stats, path)`.
+    Timing is recorded once the file is exhausted, and so is how much
+    the peak resident memory grew while it was read, including by what
+    the caller built from its rows.
+    """
+    file_stats = stats[path] = {"rows": 0, "dropped": 0}
+    baseline = peak_rss()
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="", buffering=CHUNK_SIZE) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        indices = [header.index(column) for column in columns]
+        width = max(indices) + 1
+        rows = 0
+        short = 0
+        for row in reader:
+            rows += 1
+            if len(row) < width:
+                short += 1
+                continue
+            yield tuple(row[i] for i in indices)
+    file_stats["rows"] = rows
+    file_stats["dropped"] += short
+    file_stats["seconds"] = time.perf_counter() - start
+    file_stats["rows_per_sec"] = rows / file_stats["seconds"] if file_stats["seconds"] else 0.0
+    peak = peak_rss()
+    file_stats["peak_growth_bytes"] = None if peak is None else peak - baseline
+
+
+def dropped(stats, path):
+    """
+    Records one row of `path` dropped by the caller.
+    """
+    stats[path]["dropped"] += 1
+
+
+def format_stats(stats):
+    """
+    Returns one human-readable line per file in `stats`.
+    """
+    lines = []
+    for path, file_stats in stats.items():
+        memory = file_stats.get("peak_growth_bytes")
+        memory = "unknown" if memory is None else f"+{memory / (1 << 20):.1f} MiB"
+        lines.append(
+            f"{path}: {file_stats['rows']} rows, {file_stats['dropped']} dropped, "
+            f"{file_stats['rows_per_sec']:.0f} rows/sec, peak memory {memory}"
+        )
+    return lines
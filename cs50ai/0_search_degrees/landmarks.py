@@ -0,0 +1,158 @@
+import os
+import struct
+from array import array
+
+from snapshot import SOURCES, source_key
+
+INDEX_VERSION = 1
+INDEX_NAME = "landmarks.index"
+MAGIC = b"DEGLMRK\0"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+# magic, version, person count, landmark count, then (mtime_ns, size) per source
+HEADER = struct.Struct(f"<8sIII{2 * len(SOURCES)}q")
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few landmark people to everybody else, giving
+    ALT-style lower and upper bounds on the degrees between two people.
+    """
+
+    def __init__(self, person_ids, landmarks, distances):
+        self.person_ids = person_ids
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(person_ids)
+        }
+        # Person indices of the landmarks, and one distance array per landmark
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, person_ids, neighbors, degree, count=32):
+        """
+        Picks the `count` people with the highest `degree(person_id)` as
+        landmarks and runs a BFS from each over
+        `neighbors(person_id, movies_seen)`, which yields (movie_id,
+        person_id) pairs for movies not yet in `movies_seen`, adding them.
+        """
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        ranked = sorted(range(len(person_ids)), key=lambda i: -degree(person_ids[i]))
+        landmarks = ranked[:count]
+
+        distances = []
+        for landmark in landmarks:
+            distance = array("H", [UNREACHABLE]) * len(person_ids)
+            distance[landmark] = 0
+            frontier = [person_ids[landmark]]
+            movies_seen = set()
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for person_id in frontier:
+                    for _, neighbor_id in neighbors(person_id, movies_seen):
+                        i = person_index[neighbor_id]
+                        if distance[i] == UNREACHABLE:
+                            distance[i] = min(depth, UNREACHABLE - 1)
+                            next_frontier.append(neighbor_id)
+                frontier = next_frontier
+            distances.append(distance)
+        return cls(person_ids, landmarks, distances)
+
+    def lower_bound(self, person_id, target):
+        """
+        Returns a lower bound on the degrees between two people,
+        or None if some landmark proves they are not connected.
+        """
+        return self.bounds_to(target)(person_id)
+
+    def bounds_to(self, target):
+        """
+        Returns a memoized lower_bound(person_id, target) function
+        for a search towards a fixed target.
+        """
+        j = self.person_index[target]
+        targets = [(distance, distance[j]) for distance in self.distances]
+        cache = {}
+
+        def lower_bound(person_id):
+            if person_id in cache:
+                return cache[person_id]
+            i = self.person_index[person_id]
+            bound = 0
+            for distance, b in targets:
+                a = distance[i]
+                if (a == UNREACHABLE) != (b == UNREACHABLE):
+                    bound = None
+                    break
+                if a != UNREACHABLE and abs(a - b) > bound:
+                    bound = abs(a - b)
+            cache[person_id] = bound
+            return bound
+
+        return lower_bound
+
+    def upper_bound(self, person_id, target):
+        """
+        Returns an upper bound on the degrees between two people through
+        a landmark, or None if no landmark reaches both of them.
+        """
+        i = self.person_index[person_id]
+        j = self.person_index[target]
+        bound = None
+        for distance in self.distances:
+            a, b = distance[i], distance[j]
+            if a != UNREACHABLE and b != UNREACHABLE:
+                if bound is None or a + b < bound:
+                    bound = a + b
+        return bound
+
+    def save(self, directory):
+        """
+        Writes the index next to the dataset, keyed on its CSV files.
+        """
+        path = index_path(directory)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, INDEX_VERSION, len(self.person_ids), len(self.landmarks),
+                *source_key(directory),
+            ))
+            array("i", self.landmarks).tofile(f)
+            for distance in self.distances:
+                distance.tofile(f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, directory, person_ids):
+        """
+        Reads the index of `directory`, or returns None if it is missing,
+        from another version, or built from different data.
+        """
+        try:
+            with open(index_path(directory), "rb") as f:
+                header = f.read(HEADER.size)
+                if len(header) != HEADER.size:
+                    return None
+                magic, version, people, count, *key = HEADER.unpack(header)
+                if (magic, version, people) != (MAGIC, INDEX_VERSION, len(person_ids)):
+                    return None
+                if key != source_key(directory):
+                    return None
+                landmarks = array("i")
+                landmarks.fromfile(f, count)
+                distances = []
+                for _ in range(count):
+                    distance = array("H")
+                    distance.fromfile(f, people)
+                    distances.append(distance)
+        except (OSError, EOFError):
+            return None
+        return cls(person_ids, list(landmarks), distances)
+
+
+def index_path(directory):
+    return os.path.join(directory, INDEX_NAME)
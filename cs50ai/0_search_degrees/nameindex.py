@@ -0,0 +1,111 @@
+import bisect
+
+
+class NameIndex():
+    """
+    Case-insensitive index of person names supporting exact, prefix and
+    edit-distance lookups, with candidates ranked by number of movies.
+
+    Names are kept in three parallel lists sorted by lowercase name, so
+    the index costs little more than the names themselves and every
+    lookup is a range scan found with bisect.
+    """
+
+    def __init__(self, people, movie_count):
+        """
+        `people` is an iterable of (person_id, name) pairs, and
+        `movie_count(person_id)` is used to rank candidates.
+        """
+        self.movie_count = movie_count
+        entries = sorted((name.lower(), person_id, name) for person_id, name in people)
+        self.keys = [key for key, _, _ in entries]
+        self.person_ids = [person_id for _, person_id, _ in entries]
+        self.names = [name for _, _, name in entries]
+
+    def exact(self, name):
+        """
+        Returns the person_ids with exactly this name, ignoring case.
+        """
+        name = name.lower()
+        start = bisect.bisect_left(self.keys, name)
+        end = bisect.bisect_right(self.keys, name, start)
+        return self.person_ids[start:end]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` (person_id, name) pairs whose name starts
+        with `prefix`, most prolific first.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, successor(prefix), start) if prefix else len(self.keys)
+        matches = sorted(
+            range(start, end),
+            key=lambda i: (-self.movie_count(self.person_ids[i]), self.person_ids[i])
+        )
+        return [(self.person_ids[i], self.names[i]) for i in matches[:limit]]
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (person_id, name, distance) triples whose
+        name is within `max_distance` edits of `name`, closest and then
+        most prolific first.
+
+        Walks the sorted names keeping one row of the Levenshtein table
+        per character of the current name. Rows for the prefix it shares
+        with the previous name are reused, and once a prefix's row cannot
+        get back under `max_distance` every name starting with it is
+        skipped at once.
+        """
+        name = name.lower()
+        keys = self.keys
+        matches = []
+
+        # rows[depth] is the row of the table for key[:depth]
+        rows = [list(range(len(name) + 1))]
+        covered = ""
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            shared = 0
+            while shared < len(covered) and shared < len(key) and covered[shared] == key[shared]:
+                shared += 1
+            del rows[shared + 1:]
+
+            pruned = False
+            for depth in range(shared, len(key)):
+                row = rows[-1]
+                char = key[depth]
+                next_row = [row[0] + 1]
+                for j in range(1, len(name) + 1):
+                    next_row.append(min(
+                        next_row[j - 1] + 1,
+                        row[j] + 1,
+                        row[j - 1] + (name[j - 1] != char),
+                    ))
+                if min(next_row) > max_distance:
+                    i = bisect.bisect_left(keys, successor(key[:depth + 1]), i + 1)
+                    pruned = True
+                    break
+                rows.append(next_row)
+            covered = key[:len(rows) - 1]
+            if pruned:
+                continue
+
+            if rows[-1][-1] <= max_distance:
+                matches.append((rows[-1][-1], self.person_ids[i], i))
+            i += 1
+
+        matches.sort(key=lambda match: (match[0], -self.movie_count(match[1]), match[1]))
+        return [
+            (person_id, self.names[i], distance)
+            for distance, person_id, i in matches[:limit]
+        ]
+
+
+def successor(prefix):
+    """
+    Returns the smallest string greater than every string starting with
+    the non-empty `prefix`.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
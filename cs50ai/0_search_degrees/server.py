@@ -0,0 +1,278 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+
+import degrees
+
+OPS = ["shortest_path", "person_id_for_name", "search_names", "stats"]
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+BUCKETS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, float("inf")]
+
+
+class LatencyHistogram():
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.requests = 0
+
+    def record(self, seconds):
+        milliseconds = seconds * 1000
+        for i, bound in enumerate(BUCKETS):
+            if milliseconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += milliseconds
+        self.requests += 1
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "mean_ms": self.total / self.requests if self.requests else 0.0,
+            "buckets_ms": {
+                ("inf" if bound == float("inf") else str(bound)): count
+                for bound, count in zip(BUCKETS, self.counts)
+            },
+        }
+
+
+class PathCache():
+    """
+    Least-recently-used cache of shortest_path results.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+class DegreesServer():
+    """
+    Answers JSON-line requests against data loaded once by degrees.load_data:
+
+        {"op": "shortest_path", "source": ..., "target": ...}
+        {"op": "person_id_for_name", "name": ...}
+        {"op": "search_names", "query": ..., "mode": "prefix" or "fuzzy"}
+        {"op": "stats"}
+
+    Each response is one JSON line, with an "error" key if the request failed.
+    """
+
+    def __init__(self, cache_size=1024):
+        self.cache = PathCache(cache_size)
+        self.histograms = {}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response, op, elapsed = await self.respond(line)
+                self.histograms.setdefault(op, LatencyHistogram()).record(elapsed)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionResetError, BrokenPipeError):
+                pass
+
+    async def respond(self, line):
+        """
+        Returns (response, op, seconds taken) for one request line. Any
+        failure becomes an error response, so the connection stays open.
+        """
+        start = time.perf_counter()
+        op = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            op = request.get("op")
+            response = await self.dispatch(op, request)
+        except (ValueError, KeyError) as e:
+            response = {"error": f"bad request: {e}"}
+        except Exception as e:
+            response = {"error": f"internal error: {type(e).__name__}: {e}"}
+        op = op if op in OPS else "invalid"
+        return response, op, time.perf_counter() - start
+
+    async def dispatch(self, op, request):
+        # Lookups and searches run in worker threads so other connections
+        # keep being served
+        loop = asyncio.get_running_loop()
+        if op == "shortest_path":
+            return await self.shortest_path(field(request, "source"), field(request, "target"))
+        elif op == "person_id_for_name":
+            return await loop.run_in_executor(None, self.person_id_for_name, field(request, "name"))
+        elif op == "search_names":
+            return await loop.run_in_executor(
+                None, self.search_names, field(request, "query"), field(request, "mode", "prefix")
+            )
+        elif op == "stats":
+            return self.stats()
+        return {"error": f"unknown op: {op}"}
+
+    async def shortest_path(self, source_query, target_query):
+        loop = asyncio.get_running_loop()
+        source, target, error = await loop.run_in_executor(None, resolve, source_query, target_query)
+        if error is not None:
+            return {"error": error}
+
+        key = (source, target)
+        path = self.cache.get(key)
+        if path is None:
+            path = await loop.run_in_executor(None, search, source, target)
+            self.cache.put(key, path)
+        return {
+            "source_id": source,
+            "target_id": target,
+            "degrees": None if path is False else len(path),
+            "path": None if path is False else path,
+        }
+
+    def person_id_for_name(self, name):
+        person_ids = sorted(degrees.person_ids_for_name(name))
+        people = []
+        for person_id in person_ids:
+            person = degrees.person_for_id(person_id)
+            people.append({"id": person_id, "name": person["name"], "birth": person["birth"]})
+        return {"people": people}
+
+    def search_names(self, query, mode):
+        if mode == "prefix":
+            matches = [
+                {"id": person_id, "name": name}
+                for person_id, name in degrees.get_name_index().prefix(query)
+            ]
+        elif mode == "fuzzy":
+            matches = [
+                {"id": person_id, "name": name, "distance": distance}
+                for person_id, name, distance in degrees.get_name_index().fuzzy(query)
+            ]
+        else:
+            return {"error": f"unknown mode: {mode}"}
+        return {"people": matches}
+
+    def stats(self):
+        return {
+            "latency": {
+                op: histogram.summary() for op, histogram in self.histograms.items()
+            },
+            "cache": {
+                "entries": len(self.cache.entries),
+                "size": self.cache.size,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+        }
+
+
+def field(request, key, default=None):
+    """
+    Returns the string field `key` of a request, or `default` if it is
+    missing and has one. Raises ValueError for anything else.
+    """
+    if key not in request:
+        if default is None:
+            raise ValueError(f"missing field: {key}")
+        return default
+    value = request[key]
+    if not isinstance(value, str):
+        raise ValueError(f"field {key} must be a string")
+    return value
+
+
+def resolve(source_query, target_query):
+    """
+    Returns (source, target, None) for the people two queries name, or
+    (None, None, error message) if either cannot be resolved.
+    """
+    source, error = degrees.resolve_person(source_query)
+    if error is None:
+        target, error = degrees.resolve_person(target_query)
+    if error is not None:
+        return None, None, error
+    return source, target, None
+
+
+def search(source, target):
+    """
+    Returns the shortest path, or False if there is none, so that
+    "not connected" can be cached alongside real paths.
+    """
+    if degrees.graph is not None:
+        path = degrees.graph.shortest_path(source, target)
+    else:
+        path = degrees.shortest_path_bidirectional(source, target)
+    return False if path is None else path
+
+
+async def serve(server, socket_path, port):
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.handle, path=socket_path)
+        print(f"Listening on {socket_path}", file=sys.stderr)
+    else:
+        listener = await asyncio.start_server(server.handle, host="127.0.0.1", port=port)
+        print(f"Listening on 127.0.0.1:{port}", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [directory] [--socket PATH | --port N] [--compact] [--cache-size N]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--port", type=int, default=5050, help="localhost TCP port")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="load the data into a compact integer-indexed graph",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="number of recent shortest_path results to keep",
+    )
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact)
+    # Built before serving, so no request pays for it
+    degrees.get_name_index()
+    print("Data loaded.", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(DegreesServer(args.cache_size), args.socket, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph
+
+# Bump whenever the layout below changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+SNAPSHOT_NAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Integer CSR arrays, stored as raw native "i" items
+ARRAY_SECTIONS = ["person_offsets", "person_movies", "movie_offsets", "movie_people"]
+
+# String tables, stored as one "\0"-joined UTF-8 blob each
+STRING_SECTIONS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+]
+
+# magic, version, byte order, item size, then (mtime_ns, size) per source
+HEADER = struct.Struct(f"<8sIcB{2 * len(SOURCES)}q")
+# (offset, length) for every section, in the order above
+TABLE = struct.Struct(f"<{2 * (len(ARRAY_SECTIONS) + len(STRING_SECTIONS))}q")
+ALIGNMENT = 8
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_key(directory):
+    """
+    Returns the (mtime_ns, size) of every CSV file the snapshot is built from.
+    """
+    key = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.extend([stat.st_mtime_ns, stat.st_size])
+    return key
+
+
+def _header(key):
+    byteorder = b"<" if sys.byteorder == "little" else b">"
+    return HEADER.pack(
+        MAGIC, SNAPSHOT_VERSION, byteorder, array("i").itemsize, *key
+    )
+
+
+def write_snapshot(directory, graph):
+    """
+    Writes `graph` to the snapshot file of `directory`, replacing it atomically.
+    """
+    sections = [
+        array("i", getattr(graph, name)).tobytes() for name in ARRAY_SECTIONS
+    ] + [
+        "\0".join(getattr(graph, name)).encode("utf-8") for name in STRING_SECTIONS
+    ]
+
+    header = _header(source_key(directory))
+    position = HEADER.size + TABLE.size
+    table = []
+    for data in sections:
+        position += -position % ALIGNMENT
+        table.extend([position, len(data)])
+        position += len(data)
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header)
+        f.write(TABLE.pack(*table))
+        for offset, data in zip(table[::2], sections):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(temporary, path)
+
+
+def read_snapshot(directory):
+    """
+    Memory-maps the snapshot of `directory` and returns it as a Graph.
+
+    Returns None if there is no snapshot, or if it was written by another
+    snapshot version or from CSV files that have changed since.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size + TABLE.size:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        key = source_key(directory)
+    except OSError:
+        return None
+
+    if buffer[:HEADER.size] != _header(key):
+        buffer.close()
+        return None
+
+    table = TABLE.unpack_from(buffer, HEADER.size)
+    view = memoryview(buffer)
+    fields = {}
+    names = ARRAY_SECTIONS + STRING_SECTIONS
+    for name, offset, length in zip(names, table[::2], table[1::2]):
+        if name in ARRAY_SECTIONS:
+            # Zero-copy: the CSR arrays are read straight from the mapping
+            fields[name] = view[offset:offset + length].cast("i")
+        else:
+            fields[name] = str(view[offset:offset + length], "utf-8").split("\0")
+
+    # "".split() gives one empty string, so restore empty tables by count
+    counts = {
+        "person": len(fields["person_offsets"]) - 1,
+        "movie": len(fields["movie_offsets"]) - 1,
+    }
+    for name in STRING_SECTIONS:
+        if not counts[name.split("_")[0]]:
+            fields[name] = []
+    return Graph(**fields)
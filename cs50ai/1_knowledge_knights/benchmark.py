@@ -0,0 +1,75 @@
+import random
+import sys
+import time
+
+import puzzle
+from logic import And, Biconditional, Implication, Not, Or, Symbol, model_check
+
+METHODS = ["enumerate", "truth-table", "sat"]
+
+# Random knowledge bases, from this many symbols up to the maximum
+MIN_SYMBOLS = 4
+QUERIES = 10
+
+
+def random_sentence(rng, symbols, depth):
+    """
+    Returns a random sentence over `symbols`, nested up to `depth` deep.
+    """
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(symbols)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(rng, symbols, depth - 1))
+    if kind == 1:
+        return And(*[random_sentence(rng, symbols, depth - 1) for _ in range(rng.randint(2, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(rng, symbols, depth - 1) for _ in range(rng.randint(2, 3))])
+    if kind == 3:
+        return Implication(random_sentence(rng, symbols, depth - 1),
+                           random_sentence(rng, symbols, depth - 1))
+    return Biconditional(random_sentence(rng, symbols, depth - 1),
+                         random_sentence(rng, symbols, depth - 1))
+
+
+def workloads(max_symbols):
+    """
+    Returns (name, [(knowledge, query)]) pairs: the puzzles, then random
+    knowledge bases of a growing number of symbols.
+    """
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    knowledges = [puzzle.knowledge0, puzzle.knowledge1, puzzle.knowledge2, puzzle.knowledge3]
+    yield "puzzles", [(knowledge, symbol) for knowledge in knowledges for symbol in symbols]
+
+    rng = random.Random(0)
+    for n in range(MIN_SYMBOLS, max_symbols + 1, 2):
+        names = [Symbol(f"P{i}") for i in range(n)]
+        # Every symbol must occur so there are 2^n models to check
+        knowledge = And(*[random_sentence(rng, names, 3) for _ in range(n)], Or(*names))
+        queries = [random_sentence(rng, names, 2) for _ in range(QUERIES)]
+        yield f"{n} symbols", [(knowledge, query) for query in queries]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [max symbols]")
+    max_symbols = int(sys.argv[1]) if len(sys.argv) == 2 else 12
+
+    print(f"{'workload':>12} " + " ".join(f"{method:>12}" for method in METHODS))
+    for name, checks in workloads(max_symbols):
+        answers = {}
+        times = []
+        for method in METHODS:
+            start = time.perf_counter()
+            answers[method] = [model_check(knowledge, query, method) for knowledge, query in checks]
+            times.append(time.perf_counter() - start)
+        print(f"{name:>12} " + " ".join(f"{elapsed * 1000:>10.2f}ms" for elapsed in times))
+
+        for method in METHODS:
+            if answers[method] != answers["enumerate"]:
+                sys.exit(f"{method} disagrees with enumerate on {name}")
+
+
+if __name__ == "__main__":
+    main()
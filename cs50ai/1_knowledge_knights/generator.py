@@ -0,0 +1,106 @@
+import random
+import string
+import sys
+
+from logic import And, Biconditional, Implication, KnowledgeBase, Not, Or, Symbol
+
+# How deep statements nest connectives
+DEPTH = 2
+
+
+class Puzzle():
+    """
+    A random knights and knaves puzzle with a single solution.
+
+    Every person is a knight, who only says true things, or a knave,
+    who only says false things. Statements are added, each true or
+    false as its speaker's kind demands, until the knowledge entails
+    the kind of every person.
+    """
+
+    def __init__(self, people, rng=None, depth=DEPTH):
+        self.rng = rng or random.Random()
+        self.depth = depth
+        self.names = [
+            string.ascii_uppercase[i] if people <= 26 else f"P{i}"
+            for i in range(people)
+        ]
+        self.knights = [Symbol(f"{name} is a Knight") for name in self.names]
+        self.knaves = [Symbol(f"{name} is a Knave") for name in self.names]
+        self.solution = {
+            name: self.rng.random() < 0.5 for name in self.names
+        }
+        self.model = {}
+        for name, knight, knave in zip(self.names, self.knights, self.knaves):
+            self.model[knight.name] = self.solution[name]
+            self.model[knave.name] = not self.solution[name]
+
+        # Everyone is a knight or a knave, but not both
+        self.rules = [
+            And(Or(knight, knave), Not(And(knight, knave)))
+            for knight, knave in zip(self.knights, self.knaves)
+        ]
+        self.statements = []
+
+        kb = KnowledgeBase(*self.rules)
+        while not all(kb.entails(symbol) or kb.entails(Not(symbol)) for symbol in self.knights):
+            speaker = self.rng.randrange(people)
+            statement = self.statement(self.solution[self.names[speaker]])
+            self.statements.append((self.names[speaker], statement))
+            kb.add(self.says(speaker, statement))
+
+    def statement(self, truth):
+        """
+        Returns a random statement with the given truth in the solution.
+        """
+        while True:
+            statement = self.random_statement(self.depth)
+            if statement.evaluate(self.model) == truth:
+                return statement
+
+    def random_statement(self, depth):
+        if depth == 0 or self.rng.random() < 0.3:
+            person = self.rng.randrange(len(self.names))
+            return self.rng.choice([self.knights, self.knaves])[person]
+        kind = self.rng.randrange(5)
+        if kind == 0:
+            return Not(self.random_statement(depth - 1))
+        parts = [self.random_statement(depth - 1), self.random_statement(depth - 1)]
+        return [And, Or, Implication, Biconditional][kind - 1](*parts)
+
+    def says(self, speaker, statement):
+        """
+        Returns what the speaker saying statement tells us: it is true
+        exactly when the speaker is a knight.
+        """
+        return Biconditional(self.knights[speaker], statement)
+
+    def knowledge(self):
+        """
+        Returns the knowledge of the puzzle as one sentence.
+        """
+        speakers = {name: i for i, name in enumerate(self.names)}
+        return And(*self.rules, *[
+            self.says(speakers[name], statement)
+            for name, statement in self.statements
+        ])
+
+    def symbols(self):
+        return [symbol for pair in zip(self.knights, self.knaves) for symbol in pair]
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python generator.py people [seed]")
+    seed = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    puzzle = Puzzle(int(sys.argv[1]), random.Random(seed))
+
+    for name, statement in puzzle.statements:
+        print(f'{name} says "{statement.formula()}"')
+    print("Solution:")
+    for name in puzzle.names:
+        print(f"    {name} is a {'Knight' if puzzle.solution[name] else 'Knave'}")
+
+
+if __name__ == "__main__":
+    main()
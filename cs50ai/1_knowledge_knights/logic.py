@@ -1,19 +1,82 @@
 import itertools
+import weakref
+
+import sat
+
+# Knowledge bases with more symbols than this are checked with the
+# SAT solver instead of a truth table over every model
+ENUMERATION_LIMIT = 16
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: building a sentence equal to
+    a live one returns that sentence, so equal subsentences are shared,
+    equality is identity, and the hash, symbols and formula of each
+    sentence are only worked out once.
+    """
+
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    # Every live sentence, by class and constructor arguments
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, arguments, symbols, **fields):
+        """Returns the sentence of class cls built from arguments."""
+        key = (cls, arguments)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", symbols)
+            object.__setattr__(sentence, "_formula", None)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        out. Returns None if the value depends on those symbols.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if self._formula is None:
+            object.__setattr__(self, "_formula", self.render())
+        return self._formula
+
+    def render(self):
+        """Builds the formula of the sentence."""
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return self._symbols
+
+    def encode(self, encoder):
+        """Returns a literal equivalent to the sentence in encoder's clauses."""
+        raise Exception("nothing to encode")
+
+    def tabulate(self, table):
+        """Returns the truth table's column of the sentence."""
+        raise Exception("nothing to tabulate")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +106,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern((name,), frozenset([name]), name=name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +123,29 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def encode(self, encoder):
+        return encoder.variable(self.name)
+
+    def tabulate(self, table):
+        return table.column(self.name)
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand.symbols(), operand=operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +153,31 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def render(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def encode(self, encoder):
+        return -encoder.literal(self.operand)
+
+    def tabulate(self, table):
+        return table.full ^ table.evaluate(self.operand)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        symbols = frozenset().union(*[conjunct.symbols() for conjunct in conjuncts])
+        return cls.intern(conjuncts, symbols, conjuncts=conjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +186,58 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError(
+            "sentences are immutable, build And(*knowledge.conjuncts, conjunct) "
+            "or add to a KnowledgeBase instead"
+        )
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def render(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def encode(self, encoder):
+        literals = [encoder.literal(conjunct) for conjunct in self.conjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        variable = encoder.fresh()
+        for literal in literals:
+            encoder.add(-variable, literal)
+        encoder.add(variable, *[-literal for literal in literals])
+        return variable
+
+    def tabulate(self, table):
+        column = table.full
+        for conjunct in self.conjuncts:
+            column &= table.evaluate(conjunct)
+        return column
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        symbols = frozenset().union(*[disjunct.symbols() for disjunct in disjuncts])
+        return cls.intern(disjuncts, symbols, disjuncts=disjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +246,54 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def render(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def encode(self, encoder):
+        literals = [encoder.literal(disjunct) for disjunct in self.disjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        variable = encoder.fresh()
+        for literal in literals:
+            encoder.add(variable, -literal)
+        encoder.add(-variable, *literals)
+        return variable
+
+    def tabulate(self, table):
+        column = 0
+        for disjunct in self.disjuncts:
+            column |= table.evaluate(disjunct)
+        return column
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return cls.intern(
+            (antecedent, consequent),
+            antecedent.symbols() | consequent.symbols(),
+            antecedent=antecedent,
+            consequent=consequent,
+        )
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,81 +302,358 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
+    def render(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def encode(self, encoder):
+        antecedent = encoder.literal(self.antecedent)
+        consequent = encoder.literal(self.consequent)
+        variable = encoder.fresh()
+        encoder.add(-variable, -antecedent, consequent)
+        encoder.add(variable, antecedent)
+        encoder.add(variable, -consequent)
+        return variable
+
+    def tabulate(self, table):
+        antecedent = table.evaluate(self.antecedent)
+        return (table.full ^ antecedent) | table.evaluate(self.consequent)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls.intern(
+            (left, right),
+            left.symbols() | right.symbols(),
+            left=left,
+            right=right,
+        )
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
-
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    def render(self):
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
+    def encode(self, encoder):
+        left = encoder.literal(self.left)
+        right = encoder.literal(self.right)
+        variable = encoder.fresh()
+        encoder.add(-variable, -left, right)
+        encoder.add(-variable, left, -right)
+        encoder.add(variable, left, right)
+        encoder.add(variable, -left, -right)
+        return variable
+
+    def tabulate(self, table):
+        return table.full ^ table.evaluate(self.left) ^ table.evaluate(self.right)
+
+
+class Encoder():
+    """
+    Tseitin encoding of sentences into the clauses of a SAT solver.
+
+    Each compound subsentence gets a fresh variable that the clauses make
+    equivalent to it, so the clauses grow linearly with the sentences
+    instead of exponentially as distributing Or over And would.
+    Subsentences that are equal are encoded once.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or sat.Solver()
+        self.variables = {}
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def fresh(self):
+        return self.solver.new_variable()
+
+    def add(self, *clause):
+        self.solver.add_clause(list(clause))
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        literal = self.literals.get(sentence)
+        if literal is None:
+            literal = sentence.encode(self)
+            self.literals[sentence] = literal
+        return literal
+
+    def assert_sentence(self, sentence):
+        """Adds clauses making the sentence true."""
+        # The conjuncts of a true And are each true themselves
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        else:
+            self.add(self.literal(sentence))
+
+    def model(self):
+        """Returns the symbols of the solver's last model, by name."""
+        return {
+            name: self.solver.model[variable]
+            for name, variable in self.variables.items()
+        }
+
+
+class TruthTable():
+    """
+    Truth table over every model of a list of symbols, one int per column.
+
+    Bit m of a column is the value of the sentence in model m, where
+    symbol i is true if bit i of m is set. Evaluating a sentence across
+    all 2^n models then takes one bitwise operation per connective.
+    Subsentences that are equal are evaluated once.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.models = 1 << len(self.names)
+        self.full = (1 << self.models) - 1
+        self.columns = {}
+        self.cache = {}
+
+    def column(self, name):
+        """Returns the column of the symbol called name."""
+        if name not in self.columns:
+            i = self.names.index(name)
+
+            # 2^i false models then 2^i true ones, repeated
+            block = 1 << i
+            column = ((1 << block) - 1) << block
+            width = 2 * block
+            while width < self.models:
+                column |= column << width
+                width *= 2
+            self.columns[name] = column
+        return self.columns[name]
+
+    def evaluate(self, sentence):
+        """Returns the column of the sentence."""
+        column = self.cache.get(sentence)
+        if column is None:
+            column = sentence.tabulate(self)
+            self.cache[sentence] = column
+        return column
+
+    def model(self, m):
+        """Returns model m as a dict of symbol name to bool."""
+        return {name: bool(m >> i & 1) for i, name in enumerate(self.names)}
+
+
+class KnowledgeBase():
+    """
+    Knowledge that is compiled once and queried many times.
+
+    Sentences are encoded into one SAT solver as they are added, and each
+    query is solved under an assumption that it is false, so every query
+    reuses the encoded knowledge and the clauses learned by earlier ones.
+    Answers are cached until a sentence is added. Adding knowledge never
+    takes an entailment away, so only queries that were not entailed
+    are forgotten then.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.sentences = []
+        self.answers = {}
+        self.stats = {"queries": 0, "hits": 0}
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.encoder.assert_sentence(sentence)
+        self.answers = {
+            query: answer for query, answer in self.answers.items() if answer
+        }
+
+    def entails(self, query):
+        """Checks if the knowledge entails query."""
+        self.stats["queries"] += 1
+        answer = self.answers.get(query)
+        if answer is not None:
+            self.stats["hits"] += 1
+            return answer
+        answer = not self.encoder.solver.solve([-self.encoder.literal(query)])
+        self.answers[query] = answer
+        return answer
+
+    def satisfiable(self):
+        """Checks if the knowledge has a model."""
+        return self.encoder.solver.solve()
+
+    def sentence(self):
+        """Returns the knowledge as one sentence."""
+        return And(*self.sentences)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def symbols(self):
+        return self.sentence().symbols()
+
+
+def model_check(knowledge, query, method="auto"):
+    """
+    Checks if knowledge base entails query, by enumerating its models
+    ("enumerate"), with a truth table ("truth-table"), with the SAT
+    solver ("sat"), or with whichever suits the number of symbols ("auto").
+    A KnowledgeBase always answers from its own compiled knowledge.
+    """
+    if isinstance(knowledge, KnowledgeBase):
+        return knowledge.entails(query)
+    if method == "auto":
+        symbols = knowledge.symbols() | query.symbols()
+        method = "truth-table" if len(symbols) <= ENUMERATION_LIMIT else "sat"
+    if method == "truth-table":
+        return model_check_truth_table(knowledge, query)
+    if method == "sat":
+        return model_check_sat(knowledge, query)
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+        """
+        Checks if knowledge base entails query in every model that
+        extends a particular partial model, where symbols are unassigned.
+        """
+
+        # If knowledge base is already false, no extension is a counterexample
+        known = knowledge.evaluate_partial(model)
+        if known is False:
             return True
-        else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+        # If knowledge base is already true, query must be true in all extensions
+        answer = query.evaluate_partial(model)
+        if answer is not None and (known or answer):
+            return answer
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        # Choose one of the remaining unused symbols
+        p = symbols.pop()
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        # Ensure entailment holds with the symbol both true and false
+        model[p] = True
+        entailed = check_all(knowledge, query, symbols, model)
+        if entailed:
+            model[p] = False
+            entailed = check_all(knowledge, query, symbols, model)
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # Leave the model and symbols as they were for the caller
+        del model[p]
+        symbols.append(p)
+        return entailed
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(knowledge.symbols() | query.symbols(), reverse=True)
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_sat(knowledge, query):
+    """Checks if knowledge base entails query with the SAT solver."""
+    encoder = Encoder()
+    encoder.assert_sentence(knowledge)
+
+    # Knowledge entails query if there is no model of knowledge where
+    # query is false
+    return not encoder.solver.solve([-encoder.literal(query)])
+
+
+def model_check_truth_table(knowledge, query):
+    """Checks if knowledge base entails query with a truth table."""
+    symbols = knowledge.symbols() | query.symbols()
+    table = TruthTable(sorted(symbols))
+
+    # Knowledge entails query if no model of knowledge falsifies query
+    return not table.evaluate(knowledge) & (table.full ^ table.evaluate(query))
+
+
+def models(knowledge, symbols=()):
+    """
+    Yields every model of knowledge, as a dict of symbol name to bool
+    over the symbols of knowledge and any other symbol names given.
+
+    Symbols are assigned one at a time. A partial model that already
+    makes knowledge false is dropped without assigning the rest, and
+    once one makes it true every completion of it is yielded directly.
+    """
+    names = sorted(knowledge.symbols() | set(symbols))
+
+    def extend(i, model):
+        value = knowledge.evaluate_partial(model)
+        if value is False:
+            return
+        if value is True:
+            rest = names[i:]
+            for values in itertools.product([True, False], repeat=len(rest)):
+                yield {**model, **dict(zip(rest, values))}
+            return
+        model[names[i]] = True
+        yield from extend(i + 1, model)
+        model[names[i]] = False
+        yield from extend(i + 1, model)
+        del model[names[i]]
+
+    return extend(0, {})
+
+
+def count_models(knowledge, symbols=()):
+    """
+    Returns how many models knowledge has, like len(list(models(...)))
+    without building any of them.
+    """
+    names = sorted(knowledge.symbols() | set(symbols))
+
+    def count(i, model):
+        value = knowledge.evaluate_partial(model)
+        if value is False:
+            return 0
+        if value is True:
+            return 1 << (len(names) - i)
+        model[names[i]] = True
+        total = count(i + 1, model)
+        model[names[i]] = False
+        total += count(i + 1, model)
+        del model[names[i]]
+        return total
+
+    return count(0, {})
@@ -1,4 +1,4 @@
-from logic import Symbol, And, Or, Not, model_check, Implication
+from logic import Symbol, And, Or, Not, KnowledgeBase, Implication
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -104,8 +104,10 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            # Compile each puzzle once for all of its questions
+            kb = KnowledgeBase(knowledge)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if kb.entails(symbol):
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,320 @@
+"""
+CDCL SAT solver
+
+Clauses are lists of non-zero ints, as in DIMACS: variable v is the
+literal v and its negation is -v. Unit propagation watches two literals
+per clause, so assigning a variable only visits the clauses watching
+its negation. Every conflict teaches the solver a clause (cut at the
+first unique implication point) and jumps back to the level where that
+clause forces its literal.
+"""
+
+import heapq
+
+# Conflicts between restarts are this many times the Luby sequence
+RESTART_UNIT = 100
+
+# Activities are rescaled before they overflow
+RESCALE_LIMIT = 1e100
+ACTIVITY_DECAY = 0.95
+
+
+def luby(i):
+    """
+    Returns the i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+    """
+    size = 1
+    while size < i + 1:
+        size = 2 * size + 1
+    while size - 1 != i:
+        size //= 2
+        if i >= size:
+            i -= size
+    return (size + 1) // 2
+
+
+class Solver():
+    """
+    A SAT solver that clauses can be added to between calls to solve.
+    """
+
+    def __init__(self, variables=0):
+        self.count = 0
+
+        # Per variable: 1 true, -1 false, 0 unassigned, and the decision
+        # level and clause that assigned it
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # Clauses watching each literal, indexed by literal
+        self.watches = {}
+        self.clauses = []
+        self.learned = []
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.limits = []
+        self.propagated = 0
+
+        self.order = []
+        self.increment = 1.0
+        self.unsatisfiable = False
+        self.model = None
+        self.stats = {"decisions": 0, "propagations": 0, "conflicts": 0, "restarts": 0}
+
+        self.reserve(variables)
+
+    def new_variable(self):
+        """
+        Adds a variable and returns it.
+        """
+        self.count += 1
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches[self.count] = []
+        self.watches[-self.count] = []
+        heapq.heappush(self.order, (0.0, self.count))
+        return self.count
+
+    def reserve(self, variables):
+        while self.count < variables:
+            self.new_variable()
+
+    def value(self, literal):
+        """
+        Returns 1 if `literal` is true, -1 if it is false, 0 if unassigned.
+        """
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def level(self):
+        return len(self.limits)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause, simplified by what is already known without
+        any decision. Returns False once the clauses are unsatisfiable.
+        """
+        self.backtrack(0)
+        if self.unsatisfiable:
+            return False
+        self.reserve(max((abs(literal) for literal in clause), default=0))
+
+        literals = []
+        for literal in clause:
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                # Already satisfied, or a tautology
+                return True
+            if value == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.unsatisfiable = True
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(literals)
+            self.clauses.append(literals)
+        return not self.unsatisfiable
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with a single
+        unassigned literal left. Returns a clause all of whose literals
+        are false, or None if there is no conflict.
+        """
+        values = self.values
+        watches = self.watches
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            self.stats["propagations"] += 1
+
+            watching = watches[false_literal]
+            kept = []
+            for position, clause in enumerate(watching):
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for other in range(2, len(clause)):
+                    literal = clause[other]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1], clause[other] = literal, false_literal
+                        watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watching[position + 1:])
+                        watches[false_literal] = kept
+                        return clause
+                    self.assign(first, clause)
+            watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal it
+        forces first, and the level to jump back to.
+        """
+        learned = [None]
+        seen = set()
+        current = self.level()
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for literal in clause:
+                variable = abs(literal)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == current:
+                    pending += 1
+                else:
+                    learned.append(literal)
+
+            # Resolve with the reason of the latest literal of this level
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal of the highest level after the forced one
+        deepest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > RESCALE_LIMIT:
+            self.activity = [activity / RESCALE_LIMIT for activity in self.activity]
+            self.increment /= RESCALE_LIMIT
+            self.order = [(-self.activity[v], v) for v in range(1, self.count + 1)
+                          if self.values[v] == 0]
+            heapq.heapify(self.order)
+        elif self.values[variable] == 0:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision level `level`.
+        """
+        if self.level() <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.propagated = start
+
+    def pick(self):
+        """
+        Returns the unassigned variable of highest activity, or None.
+        """
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if self.values[variable] == 0:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses have a model in which every literal
+        of `assumptions` is true, which is then kept in `model` as a
+        dict of variable to bool. Returns False otherwise.
+        """
+        self.model = None
+        self.backtrack(0)
+        if self.unsatisfiable:
+            return False
+        self.reserve(max((abs(literal) for literal in assumptions), default=0))
+
+        restarts = 0
+        budget = RESTART_UNIT * luby(1)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                if self.level() == 0:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.learned.append(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= ACTIVITY_DECAY
+
+                budget -= 1
+                if budget == 0:
+                    restarts += 1
+                    self.stats["restarts"] += 1
+                    budget = RESTART_UNIT * luby(restarts + 1)
+                    self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per level
+            level = self.level()
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick()
+            if variable is None:
+                self.model = {v: self.values[v] == 1 for v in range(1, self.count + 1)}
+                self.backtrack(0)
+                return True
+            self.stats["decisions"] += 1
+            self.limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
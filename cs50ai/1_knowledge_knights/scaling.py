@@ -0,0 +1,66 @@
+import random
+import sys
+import time
+import tracemalloc
+
+from generator import Puzzle
+from logic import KnowledgeBase, model_check
+
+BACKENDS = ["enumerate", "truth-table", "sat", "knowledge-base"]
+
+# Backends that go through every model are skipped above this many symbols
+MODEL_LIMITS = {"enumerate": 20, "truth-table": 20}
+
+
+def solve(backend, puzzle):
+    """
+    Returns which of the puzzle's symbols the knowledge entails.
+    """
+    if backend == "knowledge-base":
+        kb = KnowledgeBase(puzzle.knowledge())
+        return [kb.entails(symbol) for symbol in puzzle.symbols()]
+    knowledge = puzzle.knowledge()
+    return [model_check(knowledge, symbol, backend) for symbol in puzzle.symbols()]
+
+
+def measure(backend, puzzle):
+    """
+    Returns (answers, seconds, peak bytes allocated) of solving a puzzle.
+    Memory is traced in a second run, so tracing does not slow the timed one.
+    """
+    start = time.perf_counter()
+    answers = solve(backend, puzzle)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    solve(backend, puzzle)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return answers, elapsed, peak
+
+
+def main():
+    if len(sys.argv) not in [1, 2, 3]:
+        sys.exit("Usage: python scaling.py [max people] [seed]")
+    max_people = int(sys.argv[1]) if len(sys.argv) >= 2 else 10
+    seed = int(sys.argv[2]) if len(sys.argv) == 3 else 0
+
+    print(f"{'people':>6} {'statements':>10} " + " ".join(f"{backend:>22}" for backend in BACKENDS))
+    for people in range(2, max_people + 1):
+        puzzle = Puzzle(people, random.Random(seed + people))
+        expected = [puzzle.model[symbol.name] for symbol in puzzle.symbols()]
+
+        cells = []
+        for backend in BACKENDS:
+            if 2 * people > MODEL_LIMITS.get(backend, 2 * people):
+                cells.append(f"{'-':>22}")
+                continue
+            answers, elapsed, peak = measure(backend, puzzle)
+            if answers != expected:
+                sys.exit(f"{backend} got the wrong solution for {people} people")
+            cells.append(f"{elapsed * 1000:>10.2f}ms {peak / 1024:>8.0f}KiB")
+        print(f"{people:>6} {len(puzzle.statements):>10} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
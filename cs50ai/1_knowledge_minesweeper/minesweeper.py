@@ -1,6 +1,7 @@
 import itertools
 import random
 import logging
+from collections import deque
 
 
 logger = logging.getLogger(__name__)
@@ -113,6 +114,12 @@ class Sentence:
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable value that is equal for equal sentences.
+        """
+        return frozenset(self.cells), self.count
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -170,28 +177,114 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, by key, and the
+        # keys of the sentences mentioning each cell
+        self.sentences = {}
+        self.cell_index = {}
+
+        # Keys of sentences that changed since inference last looked at them
+        self.worklist = deque()
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true
+        """
+        return list(self.sentences.values())
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge, unless it is empty or
+        already known, and queues it for inference.
+        """
+        key = sentence.key()
+        if not sentence.cells or key in self.sentences:
+            return
+        self.sentences[key] = sentence
+        for cell in sentence.cells:
+            self.cell_index.setdefault(cell, set()).add(key)
+        self.worklist.append(key)
+
+    def remove_sentence(self, key):
+        sentence = self.sentences.pop(key)
+        for cell in sentence.cells:
+            self.cell_index[cell].discard(key)
+        return sentence
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         logger.info(f"mark_mine: {cell}")
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.cell_index.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
+        self.cell_index.pop(cell, None)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         logger.info(f"mark_safe: {cell}")
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.cell_index.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
+        self.cell_index.pop(cell, None)
+
+    def infer(self):
+        """
+        Draws every conclusion from the sentences on the worklist.
+
+        A sentence whose cells are all safe or all mines marks them,
+        which changes the sentences sharing those cells. Otherwise, a
+        sentence whose cells are a subset of another's tells us the
+        difference holds the difference of their counts. Only sentences
+        sharing a cell can be subsets of each other, so each sentence is
+        only compared to those, and only when one of them has changed.
+        """
+        while self.worklist:
+            key = self.worklist.popleft()
+            sentence = self.sentences.get(key)
+            if sentence is None:
+                continue  # changed or merged since it was queued
+
+            if sentence.count == 0:
+                logger.info(f"Found a sentence with 0 mines: {sentence}")
+                for cell in list(sentence.cells):
+                    self.mark_safe(cell)
+                continue
+            if sentence.count == len(sentence.cells):
+                logger.info(f"Found a sentence with ALL mines: {sentence}")
+                for cell in list(sentence.cells):
+                    self.mark_mine(cell)
+                continue
+
+            neighbors = set()
+            for cell in sentence.cells:
+                neighbors |= self.cell_index.get(cell, set())
+            neighbors.discard(key)
+            for other_key in neighbors:
+                other = self.sentences[other_key]
+                if sentence.cells < other.cells:
+                    smaller, larger = sentence, other
+                elif other.cells < sentence.cells:
+                    smaller, larger = other, sentence
+                else:
+                    continue
+                new_sentence = Sentence(larger.cells - smaller.cells, larger.count - smaller.count)
+                if new_sentence.key() not in self.sentences:
+                    logger.info(f"Found a new set: {new_sentence}")
+                    self.add_sentence(new_sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -237,59 +330,10 @@ class MinesweeperAI:
         # so we take those out from the count
         count_without_known = count - neighbor_mines_count
         if neighbor_cells:  # if there are some unknown cells, add the sentence
-            new_sentence = Sentence(neighbor_cells, count_without_known)
-            self.knowledge.append(new_sentence)
-        # 4
-        # mark any additional cell as safe or mine
-        # keep a loop unless there are no updates
-        updates = True
-        while updates:
-            updates = False
-            new_safes = set()
-            new_mines = set()
-            # check sentences with 0 mines
-            for sentence in self.knowledge:
-                if sentence.count == 0:
-                    logger.info(f"Found a sentence with 0 mines: {sentence}")
-                    updates = True
-                    for cell in sentence.cells:
-                        new_safes.add(cell)
-            # check sentences with same number of mines and cells
-            for sentence in self.knowledge:
-                if sentence.count == len(sentence.cells):
-                    logger.info(f"Found a sentence with ALL mines: {sentence}")
-                    for cell in sentence.cells:
-                        new_mines.add(cell)
-            if len(new_mines) or len(new_safes):
-                updates = True
-                for new_safe in new_safes:
-                    self.mark_safe(new_safe)
-                for new_mine in new_mines:
-                    self.mark_mine(new_mine)
-                # now we have used the info available and probably some sentences are empty
-                # so we can remove them from the knowledge
-                self.knowledge = [sentence for sentence in self.knowledge if sentence.cells]
-
-        # 5) add any new sentences to the AI's knowledge base
-        #    if they can be inferred from existing knowledge
-        infering_new_sets = True
-        while infering_new_sets:
-            infering_new_sets = False
-            new_set = set()
-            new_count = 0
-            for sentence1 in self.knowledge:
-                for sentence2 in self.knowledge:
-                    if sentence1 == sentence2:
-                        continue
-                    if sentence1.cells.issubset(sentence2.cells):
-                        new_set = sentence2.cells - sentence1.cells
-                        new_count = sentence2.count - sentence1.count
-                        new_sentence = Sentence(new_set, new_count)
-                        if new_sentence not in self.knowledge:
-                            logger.info(f"Found a new set: {new_sentence}")
-                            self.knowledge.append(new_sentence)
-                            infering_new_sets = True
-                            break
+            self.add_sentence(Sentence(neighbor_cells, count_without_known))
+        # 4 and 5) mark any additional cells as safe or mines, and add any
+        # new sentences, that can be concluded from what changed
+        self.infer()
 
         # logging to see the progress
         logger.info(f"safes: {self.safes}")